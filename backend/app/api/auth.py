@@ -1,7 +1,7 @@
 # app/api/auth.py
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db.session import get_async_db
 from ..db.models import User
 from ..core.auth import get_current_user
 
@@ -10,13 +10,13 @@ router = APIRouter()
 @router.post("/register")
 async def register_user(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user after successful Auth0 authentication
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.id == current_user["sub"]).first()
+    existing_user = await db.get(User, current_user["sub"])
     if existing_user:
         return {"message": "User already registered"}
 
@@ -26,20 +26,20 @@ async def register_user(
         email=current_user.get("email", "")
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return {"message": "User registered successfully"}
 
 @router.get("/me")
 async def get_user_profile(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the current user's profile
     """
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
+    user = await db.get(User, current_user["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -1,131 +1,210 @@
 # app/api/shows.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+import sqlite3
+import threading
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 from ..db.session import get_db
 from ..db.models import Show, Song
 from ..core.auth import get_current_user
-from ..services.cache_manager import CacheManager, QueueManager
-from ..services.jauntdb_service import JauntDBService
-import internetarchive as ia
+from ..services.cache_manager import CacheManager, QueueManager, TrackTooLargeError
+from ..services.jauntdb_service import AsyncJauntDBService, JauntDBService
+from ..services.data_sync_service import ArchiveScraper
+from ..services.metadata_cache import MetadataCache, ItemNotFound
+from ..utils.range_response import RangeFileResponse
 
 router = APIRouter()
-cache_manager = CacheManager()
-queue_manager = QueueManager()
+metadata_cache = MetadataCache()
 db_service = JauntDBService('/Users/alhanger/Documents/Personal/The Jauntee Web App/jauntee-music-stream/jaunt-data/')
+async_db_service = AsyncJauntDBService(db_service)
+cache_manager = CacheManager(metadata_cache, async_db_service)
+queue_manager = QueueManager(cache_manager, async_db_service)
+_refresh_lock = threading.Lock()
 
 @router.get("/years")
-async def get_available_years():
-    
-    print("Get all available years of shows")
-    # #TODO: add collection name as env variable
-    # query = "collection:TheJauntee"
-    # params = {'fields':'year'}
-    # search = ia.search_items(query, params=params)
-    # years = set()
-    
-    # for result in search:
-    #     year = result['year']
-    #     if year in years:
-    #         next
-    #     else:
-    #         years.add(year)
+async def get_available_years(response: Response):
+    """Years that have shows, newest first"""
+    summary = await async_db_service.get_summary()
+    if summary['version'] is not None:
+        response.headers["ETag"] = f'"summary-{summary["version"]}"'
+    return [entry['year'] for entry in summary['years']]
 
-    years = db_service.get_years()
-    result = db_service.load_show_data()
+@router.get("/summary")
+async def get_archive_summary(response: Response):
+    """Show counts per year, venue stats and archive totals"""
+    summary = await async_db_service.get_summary()
+    if summary['version'] is not None:
+        response.headers["ETag"] = f'"summary-{summary["version"]}"'
+    return summary
 
-    print(f"Returning years of shows: {years}")
-    return years
+@router.get("/catalog")
+async def get_show_catalog(
+    after: Optional[str] = Query(None, description="The previous page's next value"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Shows with their track names, a page at a time in show id order"""
+    shows, next_after = await async_db_service.get_show_data_page(after, limit)
+    return {"shows": shows, "next": next_after}
 
 @router.get("/search")
 async def search_shows(
+    response: Response,
+    background_tasks: BackgroundTasks,
     year: Optional[int] = None,
     venue: Optional[str] = None,
-    date: Optional[str] = None
+    date: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated show columns to return"),
+    q: Optional[str] = Query(None, description="Words to find in the venue, location or description"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Month within year"),
+    date_from: Optional[str] = Query(None, description="Earliest show date, YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, description="Latest show date, YYYY-MM-DD")
 ):
-    """Search for shows with various filters"""
-    query = "collection:TheJauntee"
-    
-    if year:
-        query += f" AND year:{year}"
-    if venue:
-        query += f" AND venue:{venue}"
-    if date:
-        query += f" AND date:{date}"
-        
-    search_results = ia.search_items(query)
-    shows = []
-    count = 0
-    
-    for result in search_results:
-        count += 1
-        print(f"Searching for show #{count}")
-        item = ia.get_item(result['identifier'])
-        show_data = {
-            'id': item.identifier,
-            'date': item.metadata.get('date'),
-            'venue': item.metadata.get('venue'),
-            'location': item.metadata.get('coverage'),
-            'description': item.metadata.get('description')
-        }
-        shows.append(show_data)
-        
+    """Search for shows with various filters, served from the local archive database"""
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+
+    try:
+        shows, total = await async_db_service.search_shows(
+            year, venue, date, limit, offset, field_list, q,
+            month=month, date_from=date_from, date_to=date_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.OperationalError as e:
+        logging.error(f"Archive database unavailable: {e}")
+        shows, total = [], 0
+
+    # An empty database means the scraper hasn't run; populate it without blocking this request
+    if total == 0 and not await async_db_service.has_shows():
+        background_tasks.add_task(refresh_archive)
+
+    response.headers["X-Total-Count"] = str(total)
     return shows
 
+@router.get("/on-this-day")
+async def shows_on_this_day(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    day: Optional[int] = Query(None, ge=1, le=31)
+):
+    """Shows played on a month and day (today by default) in any year"""
+    today = datetime.now()
+    try:
+        return await async_db_service.query_shows_on_this_day(month or today.month, day or today.day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def refresh_archive():
+    """Scrape the collection into the archive database, at most one run at a time"""
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        ArchiveScraper(str(db_service.data_dir)).scrape_shows()
+    finally:
+        _refresh_lock.release()
+
 @router.get("/{show_id}")
 async def get_show_details(show_id: str):
     """Get detailed information about a specific show"""
     try:
-        item = ia.get_item(show_id)
-        
-        # Get tracks information
-        tracks = []
-        for file in item.get_files():
-            if file.format == 'VBR MP3':
-                track = {
-                    'id': file.name,
-                    'name': file.name.split('.')[0],  # Remove extension
-                    'size': file.size,
-                    'length': file.length,
-                    'format': file.format,
-                    'bitrate': file.bitrate
-                }
-                tracks.append(track)
-        
-        show_data = {
-            'id': item.identifier,
-            'date': item.metadata.get('date'),
-            'venue': item.metadata.get('venue'),
-            'location': item.metadata.get('coverage'),
-            'description': item.metadata.get('description'),
-            'source': item.metadata.get('source'),
-            'tracks': sorted(tracks, key=lambda x: x['name'])
-        }
-        
-        return show_data
+        item = await metadata_cache.get_item(show_id)
+    except ItemNotFound:
+        raise HTTPException(status_code=404, detail=f"Show not found: {show_id}")
     except Exception as e:
-        raise HTTPException(status_code=404, detail=f"Show not found: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Error fetching show: {str(e)}")
+
+    metadata = item.get('metadata', {})
+
+    # Get tracks information
+    tracks = []
+    for file in item.get('files', []):
+        if file.get('format') == 'VBR MP3':
+            track = {
+                'id': file['name'],
+                'name': file['name'].split('.')[0],  # Remove extension
+                'size': int(file['size']) if file.get('size') else None,
+                'length': file.get('length'),
+                'format': file.get('format'),
+                'bitrate': file.get('bitrate')
+            }
+            tracks.append(track)
+
+    show_data = {
+        'id': metadata.get('identifier', show_id),
+        'date': metadata.get('date'),
+        'venue': metadata.get('venue'),
+        'location': metadata.get('coverage'),
+        'description': metadata.get('description'),
+        'source': metadata.get('source'),
+        'tracks': sorted(tracks, key=lambda x: x['name'])
+    }
+
+    return show_data
 
 @router.get("/{show_id}/stream/{filename}")
 async def stream_track(
     show_id: str,
     filename: str,
+    request: Request,
     current_user: dict = Depends(get_current_user)
 ):
     """Get streaming information for a track"""
+    stream_url = str(request.url_for("serve_track", show_id=show_id, filename=filename))
+
     # Check cache first
     cached_path = cache_manager.get_cached_path(show_id, filename)
     
     if cached_path:
-        return {"cached_path": cached_path}
+        return {"stream_url": stream_url, "is_caching": False}
         
-    # If not cached, queue for download and return direct IA stream URL
-    await cache_manager.queue_download(show_id, filename)
-    return {
-        "stream_url": f"https://archive.org/download/{show_id}/{filename}",
-        "is_caching": True
-    }
+    # If not cached, start the download now so the player attaches to it
+    try:
+        await cache_manager.open_download(show_id, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"stream_url": stream_url, "is_caching": True}
+
+@router.api_route("/{show_id}/audio/{filename}", methods=["GET", "HEAD"])
+async def serve_track(show_id: str, filename: str, request: Request):
+    """Serve a track's bytes, with HTTP Range support once it is fully cached"""
+    cached_path = cache_manager.get_cached_path(show_id, filename)
+    if cached_path:
+        try:
+            return RangeFileResponse(cached_path, request.headers)
+        except FileNotFoundError:
+            # Evicted between the lookup and the stat
+            pass
+
+    # A HEAD request never starts a download; it reports on one already running
+    if request.method == "HEAD":
+        download = cache_manager.get_in_flight(show_id, filename)
+        if download is None:
+            raise HTTPException(status_code=404, detail="Track not cached")
+    else:
+        # Not cached yet: read through the in-flight download while it fills the cache
+        try:
+            download = await cache_manager.open_download(show_id, filename)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    await download.started.wait()
+    if download.error:
+        status = getattr(download.error, 'status', None)
+        if status == 404:
+            raise HTTPException(status_code=404, detail="Track not found")
+        if isinstance(download.error, TrackTooLargeError):
+            raise HTTPException(status_code=413, detail=str(download.error))
+        raise HTTPException(status_code=502, detail=f"Upstream download failed: {download.error}")
+
+    headers = {"accept-ranges": "none"}
+    if download.content_length is not None:
+        headers["content-length"] = str(download.content_length)
+    if request.method == "HEAD":
+        return Response(status_code=200, headers=headers, media_type="audio/mpeg")
+    return StreamingResponse(download.iter_bytes(), headers=headers, media_type="audio/mpeg")
 
 @router.post("/{show_id}/queue/{filename}")
 async def add_to_queue(
@@ -135,7 +214,7 @@ async def add_to_queue(
     current_user: dict = Depends(get_current_user)
 ):
     """Add a track to the user's queue"""
-    queue_manager.add_to_queue(current_user["sub"], show_id, filename, position)
+    await queue_manager.add_to_queue(current_user["sub"], show_id, filename, position)
     return {"message": "Track added to queue"}
 
 @router.get("/queue")
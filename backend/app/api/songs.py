@@ -0,0 +1,37 @@
+# app/api/songs.py
+from fastapi import APIRouter, Query
+from typing import Optional
+from .shows import async_db_service
+
+router = APIRouter()
+
+def _seconds(duration) -> Optional[int]:
+    try:
+        return int(float(duration))
+    except (TypeError, ValueError):
+        return None
+
+@router.get("/search")
+async def search_songs(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Type-ahead search over track names, song titles and venues"""
+    tracks = await async_db_service.search_tracks(q, limit)
+
+    return [{
+        'song': {
+            # Track ids are stored as "<show_id>/<filename>"; the player wants the filename
+            'id': track['id'].split('/', 1)[-1],
+            'name': track['name'],
+            'duration': _seconds(track['duration']),
+            'track_number': track['track_number']
+        },
+        'show': {
+            'id': track['show_id'],
+            'date': track['date'],
+            'venue': track['venue'],
+            'location': track['location']
+        },
+        'snippet': track.get('snippet')
+    } for track in tracks]
@@ -9,6 +9,14 @@ class Settings(BaseSettings):
     AUTH0_ALGORITHMS: list = ["RS256"]
     CACHE_DIR: str = "./cache"
     MAX_CACHE_SIZE_GB: int = 10
+    CACHE_WORKERS: int = 4
+    CACHE_MAX_PER_HOST: int = 4
+    CACHE_STARVATION_SECONDS: int = 30
+    CACHE_PART_MAX_AGE_HOURS: int = 24
+    PREFETCH_DEPTH: int = 3
+    METADATA_TTL_SECONDS: int = 3600
+    METADATA_MEMORY_ITEMS: int = 512
+    ARCHIVE_DB_WORKERS: int = 8
     
     class Config:
         env_file = ".env"
@@ -1,5 +1,7 @@
 # app/db/session.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from ..core.config import get_settings
 
@@ -7,9 +9,23 @@ settings = get_settings()
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url: str) -> str:
+    """Swap a plain postgresql:// URL onto the asyncpg driver"""
+    parsed = make_url(url)
+    if parsed.drivername in ('postgresql', 'postgresql+psycopg2'):
+        parsed = parsed.set(drivername='postgresql+asyncpg')
+    return parsed.render_as_string(hide_password=False)
+
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,89 @@
+# app/db/sqlite_pool.py
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Union
+
+class SQLitePool:
+    """
+    Thread-safe access to a SQLite database file.
+
+    Each thread gets its own long-lived read connection, opened read-only
+    (query_only) on first use, so concurrent requests read in parallel
+    without reopening the file. Writes go through a single connection
+    guarded by a lock. The database runs in WAL mode so readers never block
+    on the writer.
+    """
+
+    def __init__(self, db_path: Union[str, Path], cached_statements: int = 256, timeout: float = 30.0):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            cached_statements: Prepared statements kept per connection
+            timeout: Seconds to wait on a locked database before failing
+        """
+        self.db_path = str(db_path)
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('PRAGMA synchronous=NORMAL')
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """This thread's read-only connection"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute('PRAGMA query_only=ON')
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        try:
+            yield conn
+        finally:
+            # Don't carry an open read transaction (and its stale snapshot) into the next use
+            if conn.in_transaction:
+                conn.rollback()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """The shared write connection; commits on success and rolls back on error"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    def close(self):
+        """Close every connection the pool has opened"""
+        self._closed = True
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        with self._write_lock:
+            self._writer.close()
@@ -1,41 +1,48 @@
 # app/services/archive.py
 import internetarchive as ia
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
 from ..core.config import get_settings
+from .data_sync_service import ArchiveScraper
 
 class ArchiveService:
+    SHOW_FIELDS = ['identifier', 'date', 'venue', 'coverage', 'description', 'source', 'publicdate', 'updatedate']
+
     def __init__(self):
         self.collection = "TheJauntee"  # The collection identifier for The Jauntee
         self.settings = get_settings()
+        # identifier -> (archive version, parsed tracks) from the last fetch
+        self._tracks: Dict[str, Tuple[Optional[str], List[Dict]]] = {}
         
-    async def search_shows(self, year: Optional[int] = None) -> List[Dict]:
+    async def search_shows(self, year: Optional[int] = None, include_tracks: bool = False) -> List[Dict]:
         """
         Search for The Jauntee shows, optionally filtered by year
+
+        Show metadata comes from a single field-projected search. With
+        include_tracks, an item is only fetched individually the first time
+        or when its publicdate/updatedate has changed since it was fetched.
         """
         query = f"collection:{self.collection}"
         if year:
             query += f" AND year:{year}"
             
         try:
-            search_results = ia.search_items(query)
+            search_results = ia.search_items(query, fields=self.SHOW_FIELDS)
             shows = []
             
             for result in search_results:
-                # Get detailed metadata for each show
-                item = ia.get_item(result['identifier'])
-                
                 # Parse and format show data
                 show_data = {
-                    'id': item.identifier,
-                    'date': self._parse_date(item.metadata.get('date')),
-                    'venue': item.metadata.get('venue'),
-                    'location': item.metadata.get('coverage'),
-                    'description': item.metadata.get('description'),
-                    'source': item.metadata.get('source'),
-                    'tracks': self._parse_tracks(item)
+                    'id': result['identifier'],
+                    'date': self._parse_date(result.get('date')),
+                    'venue': result.get('venue'),
+                    'location': result.get('coverage'),
+                    'description': result.get('description'),
+                    'source': result.get('source')
                 }
+                if include_tracks:
+                    show_data['tracks'] = self._get_tracks(result)
                 shows.append(show_data)
                 
             return shows
@@ -44,6 +51,17 @@ class ArchiveService:
             logging.error(f"Error searching shows: {e}")
             raise
             
+    def _get_tracks(self, result: Dict) -> List[Dict]:
+        """Track listing for a search hit, refetched only when the item has changed"""
+        version = ArchiveScraper.archive_version(result)
+        cached = self._tracks.get(result['identifier'])
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
+        tracks = self._parse_tracks(ia.get_item(result['identifier']))
+        self._tracks[result['identifier']] = (version, tracks)
+        return tracks
+
     def _parse_tracks(self, item) -> List[Dict]:
         """
         Parse track information from an Archive.org item
@@ -77,6 +95,7 @@ class ArchiveService:
             
         # Handle various date formats
         date_formats = [
+            '%Y-%m-%dT%H:%M:%SZ',  # Search/scrape API results
             '%Y-%m-%d',
             '%Y/%m/%d',
             '%Y.%m.%d',
@@ -1,84 +1,703 @@
 # app/services/cache_manager.py
 import os
+import re
+import hashlib
+import contextlib
+import json
+import time
 import asyncio
 import logging
+import threading
+from collections import OrderedDict, deque
+from enum import IntEnum
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+import aiohttp
 from sqlalchemy.orm import Session
 from ..core.config import get_settings
 from ..db.models import Show, Song
-import internetarchive as ia
+from .metadata_cache import MetadataCache, ItemNotFound
+
+ARCHIVE_DOWNLOAD_URL = "https://archive.org/download/{show_id}/{filename}"
+# Working files that live beside cached tracks but are never tracks themselves
+UNSERVABLE_SUFFIXES = ('.part', '.tmp')
+# Cache index changes are batched and written at most this often
+INDEX_FLUSH_SECONDS = 5
+# Matches set/disc markers in archive filenames, e.g. "jauntee2017-06-28s1t02.mp3"
+SET_TRACK_PATTERN = re.compile(r'(?:d|s)(\d+)t(\d+)', re.IGNORECASE)
+
+class CacheVerificationError(Exception):
+    """Raised when a downloaded file doesn't match the archive's size or checksum"""
+
+class UnknownTrackError(ValueError):
+    """Raised for a track that isn't an MP3 of a show in the collection"""
+
+class TrackTooLargeError(Exception):
+    """Raised when a track could never fit in the cache"""
+
+class InFlightDownload:
+    """
+    A single upstream fetch that writes a track into the cache while any number
+    of listeners read it back from the partially written file.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, show_id: str, filename: str, cache_path: Path):
+        self.show_id = show_id
+        self.filename = filename
+        self.cache_path = cache_path
+        self.part_path = cache_path.with_name(cache_path.name + '.part')
+        self.content_length: Optional[int] = None
+        self.bytes_written = 0
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.task: Optional[asyncio.Task] = None  # The fetch; held so it isn't garbage-collected mid-download
+        self.started = asyncio.Event()  # Set once upstream headers arrive (or the fetch fails)
+        self._changed = asyncio.Condition()
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait(self) -> str:
+        """Wait for the download to finish and return the cached path"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.done)
+        if self.error:
+            raise self.error
+        return str(self.cache_path)
+
+    def _open_for_read(self):
+        # The part file is renamed once complete; an open handle survives the rename
+        try:
+            return open(self.part_path, 'rb')
+        except FileNotFoundError:
+            return open(self.cache_path, 'rb')
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield the track from the first byte, following the download as it grows"""
+        await self.started.wait()
+        if self.error:
+            raise self.error
+
+        file = await asyncio.to_thread(self._open_for_read)
+        try:
+            position = 0
+            while True:
+                chunk = await asyncio.to_thread(file.read, self.chunk_size)
+                if chunk:
+                    position += len(chunk)
+                    yield chunk
+                    continue
+                if self.done:
+                    if self.error:
+                        raise self.error
+                    break
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.done or self.bytes_written > position)
+        finally:
+            file.close()
+
+class CacheIndex:
+    """
+    In-memory LRU index of cached tracks with their sizes, persisted as JSON.
+
+    Entries are kept in access order so eviction pops from the front, and the
+    running total avoids walking the cache directory on every download.
+    Changes only mark the index dirty; the owner decides when to persist,
+    snapshotting on its own thread and writing the JSON from another.
+    """
+    INDEX_FILENAME = '.cache_index.json'
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.index_path = cache_dir / self.INDEX_FILENAME
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float]]" = OrderedDict()
+        self.total_size = 0
+        self._dirty = False
+        self._write_lock = threading.Lock()
+        self.load()
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self):
+        """Load the persisted index, rebuilding it from disk if missing or unreadable"""
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+            for show_id, filename, size, last_access in entries:
+                self._entries[(show_id, filename)] = (size, last_access)
+                self.total_size += size
+        except FileNotFoundError:
+            self.rebuild()
+        except (ValueError, TypeError) as e:
+            logging.warning(f"Cache index unreadable, rebuilding: {e}")
+            self.rebuild()
+
+    def rebuild(self):
+        """Scan the cache directory once, ordering entries by modification time"""
+        self._entries.clear()
+        self.total_size = 0
+        files = []
+        for show_dir in self.cache_dir.iterdir():
+            if not show_dir.is_dir():
+                continue
+            for file in show_dir.iterdir():
+                if file.is_file() and not file.name.endswith('.part'):
+                    stat_result = file.stat()
+                    files.append((stat_result.st_mtime, show_dir.name, file.name, stat_result.st_size))
+        for mtime, show_id, filename, size in sorted(files):
+            self._entries[(show_id, filename)] = (size, mtime)
+            self.total_size += size
+        self._dirty = True
+        self.save()
+
+    def snapshot(self) -> Optional[List]:
+        """The entries to persist, or None if nothing changed since the last snapshot"""
+        if not self._dirty:
+            return None
+        self._dirty = False
+        return [[show_id, filename, size, last_access]
+                for (show_id, filename), (size, last_access) in self._entries.items()]
+
+    def write(self, entries: List):
+        """Write a snapshot atomically; safe to call from a worker thread"""
+        with self._write_lock:
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.index_path)
+
+    def save(self):
+        """Write the index now if it changed"""
+        entries = self.snapshot()
+        if entries is not None:
+            self.write(entries)
+
+    def touch(self, key: Tuple[str, str], size: Optional[int] = None):
+        """Record an access (or insert) and move the entry to the most-recent end"""
+        if key in self._entries:
+            old_size, _ = self._entries[key]
+            size = old_size if size is None else size
+            self.total_size -= old_size
+        self._entries[key] = (size or 0, time.time())
+        self._entries.move_to_end(key)
+        self.total_size += size or 0
+        self._dirty = True
+
+    def remove(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.total_size -= entry[0]
+            self._dirty = True
+
+    def least_recent(self) -> Optional[Tuple[str, str]]:
+        return next(iter(self._entries), None)
+
+class DownloadPriority(IntEnum):
+    """Download classes, most urgent first"""
+    INTERACTIVE = 0  # A listener pressed play
+    PREFETCH = 1     # Upcoming tracks in someone's queue
+    BACKGROUND = 2   # Bulk cache warm-up
+
+class DownloadQueue:
+    """
+    Priority queue of tracks to cache, one FIFO per priority class.
+
+    Re-queueing a track at a more urgent class promotes it; the stale entry is
+    skipped when it reaches the front. So lower classes can't starve, an
+    entry that has waited longer than max_wait may jump ahead, but only one
+    such entry per aged_every takes, so an aged backlog can't hold up
+    interactive requests either.
+    """
+
+    def __init__(self, max_wait: float, aged_every: int = 4):
+        self.max_wait = max_wait
+        self.aged_every = aged_every
+        self._since_aged = 0  # Takes since an aged entry last jumped the queue
+        self._queues = {priority: deque() for priority in DownloadPriority}
+        self._priority: Dict[Tuple[str, str], DownloadPriority] = {}
+        self._unfinished = 0
+        self._available = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._priority
+
+    def __len__(self) -> int:
+        return len(self._priority)
+
+    def put_nowait(self, key: Tuple[str, str], priority: DownloadPriority = DownloadPriority.BACKGROUND):
+        """Queue a track, or promote it if it is already queued at a lower class"""
+        current = self._priority.get(key)
+        if current is not None and current <= priority:
+            return
+        if current is None:
+            self._unfinished += 1
+            self._finished.clear()
+        self._priority[key] = priority
+        self._queues[priority].append((time.monotonic(), key))
+        self._available.set()
+
+    def _head(self, priority: DownloadPriority):
+        """Oldest live entry of a class, dropping entries that were promoted away"""
+        queue = self._queues[priority]
+        while queue and self._priority.get(queue[0][1]) != priority:
+            queue.popleft()
+        return queue[0] if queue else None
+
+    def _pop(self) -> Tuple[Tuple[str, str], DownloadPriority]:
+        if self._since_aged >= self.aged_every:
+            now = time.monotonic()
+            for priority in sorted(DownloadPriority, reverse=True)[:-1]:
+                head = self._head(priority)
+                if head and now - head[0] > self.max_wait:
+                    self._since_aged = 0
+                    return self._take(priority)
+        self._since_aged += 1
+        for priority in DownloadPriority:
+            if self._head(priority):
+                return self._take(priority)
+
+    def _take(self, priority: DownloadPriority) -> Tuple[Tuple[str, str], DownloadPriority]:
+        _, key = self._queues[priority].popleft()
+        del self._priority[key]
+        if not self._priority:
+            self._available.clear()
+        return key, priority
+
+    async def get(self) -> Tuple[Tuple[str, str], DownloadPriority]:
+        """Wait for the next track to cache and return it with its priority"""
+        while not self._priority:
+            await self._available.wait()
+        return self._pop()
+
+    def task_done(self):
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
 
 class CacheManager:
-    def __init__(self):
+    def __init__(self, metadata_cache: Optional[MetadataCache] = None, track_source=None):
+        """
+        Args:
+            metadata_cache: Source of archive.org item metadata
+            track_source: Object with an async get_track_filenames(show_id), used to
+                recognise known tracks without a metadata lookup
+        """
         self.settings = get_settings()
+        self.metadata_cache = metadata_cache or MetadataCache()
+        self.track_source = track_source
         self.cache_dir = Path(self.settings.CACHE_DIR)
         self.cache_dir.mkdir(exist_ok=True)
         self.max_cache_size = self.settings.MAX_CACHE_SIZE_GB * 1024 * 1024 * 1024  # Convert to bytes
-        self._download_queue = asyncio.Queue()
-        self._currently_downloading = set()
+        self.index = CacheIndex(self.cache_dir)
+        self.part_max_age = self.settings.CACHE_PART_MAX_AGE_HOURS * 3600
+        self._download_queue = DownloadQueue(self.settings.CACHE_STARVATION_SECONDS)
+        self._in_flight: Dict[Tuple[str, str], InFlightDownload] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._workers: List[asyncio.Task] = []
+        self._index_flush: Optional[asyncio.Task] = None
+        self._part_bytes = self._remove_stale_parts(set())
         
     async def start_cache_worker(self):
-        """Start the background cache worker"""
+        """Start the pool of background cache workers, and the part file sweeper"""
+        self._workers = [
+            asyncio.create_task(self._cache_worker(worker_id))
+            for worker_id in range(self.settings.CACHE_WORKERS)
+        ]
+        self._workers.append(asyncio.create_task(self._part_sweeper()))
+        await asyncio.gather(*self._workers)
+
+    async def _part_sweeper(self):
+        """Periodically remove abandoned part files off the event loop"""
+        interval = max(60, min(3600, self.part_max_age))
         while True:
+            await asyncio.sleep(interval)
+            in_flight = {download.part_path for download in self._in_flight.values()}
             try:
-                show_id, filename = await self._download_queue.get()
-                if (show_id, filename) not in self._currently_downloading:
-                    self._currently_downloading.add((show_id, filename))
-                    await self._download_file(show_id, filename)
-                    self._currently_downloading.remove((show_id, filename))
+                self._part_bytes = await asyncio.to_thread(self._remove_stale_parts, in_flight)
+            except Exception as e:
+                logging.error(f"Error sweeping partial downloads: {e}")
+
+    async def _cache_worker(self, worker_id: int):
+        """Take tracks off the download queue and cache them"""
+        while True:
+            (show_id, filename), priority = await self._download_queue.get()
+            try:
+                # Tracks already being fetched are joined, not fetched twice
+                await self._download_file(show_id, filename, priority)
+            except Exception as e:
+                logging.error(f"Error in cache worker {worker_id}: {e}")
+            finally:
                 self._download_queue.task_done()
+
+    async def queue_download(self, show_id: str, filename: str, priority: DownloadPriority = DownloadPriority.INTERACTIVE):
+        """Add a song to the download queue, promoting it if already queued at a lower priority"""
+        self.prefetch([(show_id, filename)], priority)
+
+    def prefetch(self, tracks: List[Tuple[str, str]], priority: DownloadPriority = DownloadPriority.PREFETCH):
+        """Queue tracks for caching, skipping ones already cached or downloading"""
+        for key in tracks:
+            if key in self._in_flight or key in self.index:
+                continue
+            self._download_queue.put_nowait(key, priority)
+
+    async def close(self):
+        """Stop the workers and in-flight downloads, persist the index and close the upstream session"""
+        tasks = self._workers + [download.task for download in self._in_flight.values() if download.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._index_flush is not None:
+            self._index_flush.cancel()
+            await asyncio.gather(self._index_flush, return_exceptions=True)
+        self.index.save()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _schedule_index_flush(self):
+        """Persist the index INDEX_FLUSH_SECONDS from now, batching the changes made meanwhile"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside the event loop; close() or the next scheduled flush persists the change
+            return
+        if self._index_flush is None or self._index_flush.done():
+            self._index_flush = asyncio.create_task(self._flush_index())
+
+    async def _flush_index(self):
+        await asyncio.sleep(INDEX_FLUSH_SECONDS)
+        entries = self.index.snapshot()
+        if entries is None:
+            return
+        try:
+            await asyncio.to_thread(self.index.write, entries)
+        except OSError as e:
+            logging.error(f"Error saving cache index: {e}")
+            self.index._dirty = True
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+            )
+        return self._session
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Per-host cap on concurrent upstream downloads"""
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.settings.CACHE_MAX_PER_HOST)
+        return self._host_limits[host]
+
+    async def is_known_track(self, show_id: str, filename: str) -> bool:
+        """Whether a track is in the archive database, or an MP3 of a collection item on archive.org"""
+        if self.track_source is not None:
+            try:
+                if filename in await self.track_source.get_track_filenames(show_id):
+                    return True
             except Exception as e:
-                logging.error(f"Error in cache worker: {e}")
+                logging.warning(f"Could not list tracks for {show_id}: {e}")
 
-    async def queue_download(self, show_id: str, filename: str):
-        """Add a song to the download queue"""
-        await self._download_queue.put((show_id, filename))
+        try:
+            item = await self.metadata_cache.get_item(show_id)
+        except ItemNotFound:
+            return False
+        except Exception as e:
+            logging.warning(f"Could not fetch metadata for {show_id}: {e}")
+            return False
 
-    async def _download_file(self, show_id: str, filename: str):
-        """Download a file using Internet Archive library and store it in cache"""
-        cache_path = self.cache_dir / show_id / filename
-        cache_path.parent.mkdir(exist_ok=True)
-        
-        if cache_path.exists():
-            return str(cache_path)
+        # MetadataCache only returns items in the collection
+        return any(
+            file.get('name') == filename and file.get('format') == 'VBR MP3'
+            for file in item.get('files', [])
+        )
 
-        await self._ensure_cache_space()
-        
+    async def open_download(
+        self,
+        show_id: str,
+        filename: str,
+        priority: DownloadPriority = DownloadPriority.INTERACTIVE
+    ) -> InFlightDownload:
+        """
+        Attach to a track's in-flight download, or start one if it is a known track.
+
+        Raises:
+            UnknownTrackError: If nothing is downloading the track and it isn't known
+        """
+        download = self._in_flight.get((show_id, filename))
+        if download is not None:
+            return download
+        if not await self.is_known_track(show_id, filename):
+            raise UnknownTrackError(f"Unknown track: {show_id}/{filename}")
+        return self.get_or_start_download(show_id, filename, priority)
+
+    def get_in_flight(self, show_id: str, filename: str) -> Optional[InFlightDownload]:
+        return self._in_flight.get((show_id, filename))
+
+    def get_or_start_download(
+        self,
+        show_id: str,
+        filename: str,
+        priority: DownloadPriority = DownloadPriority.INTERACTIVE
+    ) -> InFlightDownload:
+        """
+        Return the in-flight download for a track, starting one if needed.
+
+        Late-joining listeners attach to the existing fetch instead of
+        opening a second upstream connection. Interactive downloads skip the
+        per-host limit so a listener never waits behind queued work. Callers
+        must have checked the track is known; see open_download.
+        """
+        key = (show_id, filename)
+        download = self._in_flight.get(key)
+        if download is None:
+            download = InFlightDownload(show_id, filename, self._cache_path(show_id, filename))
+            self._in_flight[key] = download
+            download.task = asyncio.create_task(self._fetch(download, priority))
+        return download
+
+    async def _fetch(self, download: InFlightDownload, priority: DownloadPriority):
+        """
+        Stream a track from archive.org into its part file, then move it into place.
+
+        A part file left by an interrupted run is resumed with a Range request.
+        The finished file is checked against archive.org's size and md5 before
+        the atomic rename, so the cache path only ever holds complete tracks.
+        """
+        key = (download.show_id, download.filename)
+        url = ARCHIVE_DOWNLOAD_URL.format(
+            show_id=quote(download.show_id),
+            filename=quote(download.filename)
+        )
+        host_limit = self._host_limit(url) if priority > DownloadPriority.INTERACTIVE else contextlib.nullcontext()
         try:
-            item = ia.get_item(show_id)
-            file = item.get_file(filename)
-            file.download(str(cache_path))
-            return str(cache_path)
+            download.cache_path.parent.mkdir(exist_ok=True)
+            expected = await self._file_metadata(download.show_id, download.filename)
+            self._check_fits(download, expected.get('size'))
+            checksum = hashlib.md5()
+
+            resume_from = download.part_path.stat().st_size if download.part_path.exists() else 0
+            headers = {'Range': f'bytes={resume_from}-'} if resume_from else {}
+
+            async with host_limit, self._get_session().get(url, headers=headers) as response:
+                if response.status == 416 and resume_from:
+                    # The part file already holds every byte; only verification is left
+                    response.release()
+                elif response.status != 206 or not resume_from:
+                    response.raise_for_status()
+                    resume_from = 0
+
+                if resume_from:
+                    content_range = response.headers.get('Content-Range', '')
+                    if response.status == 206 and not content_range.startswith(f'bytes {resume_from}-'):
+                        raise CacheVerificationError(f"unexpected Content-Range on resume: {content_range}")
+                    await asyncio.to_thread(self._hash_file, download.part_path, checksum)
+                    logging.info(f"Resuming {download.show_id}/{download.filename} at byte {resume_from}")
+
+                remaining = response.content_length if response.status in (200, 206) else 0
+                download.content_length = resume_from + remaining if remaining is not None else expected.get('size')
+                download.bytes_written = resume_from
+                self._check_fits(download, download.content_length)
+                self._ensure_cache_space(download.content_length or 0)
+
+                file = await asyncio.to_thread(open, download.part_path, 'ab' if resume_from else 'wb')
+                try:
+                    download.started.set()
+                    if response.status in (200, 206):
+                        async for chunk in response.content.iter_chunked(download.chunk_size):
+                            await asyncio.to_thread(file.write, chunk)
+                            await asyncio.to_thread(file.flush)
+                            checksum.update(chunk)
+                            download.bytes_written += len(chunk)
+                            await download._notify()
+                    await asyncio.to_thread(os.fsync, file.fileno())
+                finally:
+                    file.close()
+
+            self._verify(download, expected, checksum.hexdigest())
+            os.replace(download.part_path, download.cache_path)
+            self.index.touch(key, download.bytes_written)
+            self._schedule_index_flush()
         except Exception as e:
-            logging.error(f"Error downloading file: {e}")
+            logging.error(f"Error downloading {download.show_id}/{download.filename}: {e}")
+            download.error = e
+            if isinstance(e, (CacheVerificationError, TrackTooLargeError)):
+                # Corrupt or oversized data isn't worth resuming; anything else is kept for the next attempt
+                download.part_path.unlink(missing_ok=True)
+        except asyncio.CancelledError:
+            download.error = ConnectionAbortedError(f"Download of {download.show_id}/{download.filename} was cancelled")
             raise
+        finally:
+            download.done = True
+            download.started.set()
+            self._in_flight.pop(key, None)
+            await download._notify()
 
-    async def _ensure_cache_space(self):
-        """Ensure there's enough space in the cache directory"""
-        total_size = sum(f.stat().st_size for f in self.cache_dir.glob('**/*') if f.is_file())
-        
-        if total_size > self.max_cache_size:
-            # Get list of files sorted by access time
-            files = [(f, f.stat().st_atime) for f in self.cache_dir.glob('**/*') if f.is_file()]
-            files.sort(key=lambda x: x[1])
-            
-            # Remove oldest files until we're under the limit
-            for file, _ in files:
-                if total_size <= self.max_cache_size * 0.9:  # Leave 10% buffer
-                    break
-                size = file.stat().st_size
-                file.unlink()
-                total_size -= size
+    def _check_fits(self, download: InFlightDownload, size: Optional[int]):
+        """Refuse a track that would need more than the whole cache"""
+        if size is not None and size > self.max_cache_size:
+            raise TrackTooLargeError(
+                f"{download.show_id}/{download.filename} is {size} bytes, "
+                f"larger than the {self.max_cache_size} byte cache"
+            )
+
+    def _verify(self, download: InFlightDownload, expected: Dict, md5: str):
+        """Reject a download whose size or checksum doesn't match the archive's metadata"""
+        expected_size = expected.get('size') or download.content_length
+        if expected_size is not None and download.bytes_written != expected_size:
+            raise CacheVerificationError(
+                f"size mismatch for {download.show_id}/{download.filename}: "
+                f"expected {expected_size}, got {download.bytes_written}"
+            )
+        if expected.get('md5') and expected['md5'] != md5:
+            raise CacheVerificationError(f"md5 mismatch for {download.show_id}/{download.filename}")
+
+    @staticmethod
+    def _hash_file(path: Path, checksum):
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                checksum.update(block)
+
+    async def _file_metadata(self, show_id: str, filename: str) -> Dict:
+        """Expected size and md5 of a file from the item's archive.org metadata"""
+        try:
+            files = (await self.metadata_cache.get_item(show_id)).get('files', [])
+        except Exception as e:
+            logging.warning(f"Could not fetch file metadata for {show_id}, skipping verification: {e}")
+            return {}
+
+        for file in files:
+            if file.get('name') == filename:
+                return {
+                    'size': int(file['size']) if file.get('size') else None,
+                    'md5': file.get('md5')
+                }
+        return {}
+
+    async def _download_file(self, show_id: str, filename: str, priority: DownloadPriority = DownloadPriority.INTERACTIVE):
+        """Download a file from Internet Archive and store it in cache"""
+        cached_path = self.get_cached_path(show_id, filename)
+        if cached_path:
+            return cached_path
+
+        return await (await self.open_download(show_id, filename, priority)).wait()
+
+    def _remove_stale_parts(self, in_flight: set) -> int:
+        """
+        Delete part files of downloads abandoned for longer than CACHE_PART_MAX_AGE_HOURS.
+
+        Walks every show directory, so it runs at startup and from
+        _part_sweeper on a worker thread, never per download.
+
+        Args:
+            in_flight: Part paths of running downloads, left alone
+
+        Returns:
+            Bytes held by the part files kept for resuming, not counting in-flight ones
+        """
+        cutoff = time.time() - self.part_max_age
+        remaining = 0
+        for part_path in self.cache_dir.resolve().glob('*/*.part'):
+            if part_path in in_flight:
+                continue
+            try:
+                stat_result = part_path.stat()
+                if stat_result.st_mtime < cutoff:
+                    part_path.unlink()
+                    logging.info(f"Removed abandoned partial download {part_path}")
+                else:
+                    remaining += stat_result.st_size
+            except OSError as e:
+                logging.error(f"Error checking partial download {part_path}: {e}")
+        return remaining
+
+    def _ensure_cache_space(self, incoming_size: int = 0):
+        """Evict least recently used tracks until the incoming file fits"""
+        if self.index.total_size + incoming_size <= self.max_cache_size:
+            return
+
+        # Partial downloads kept for resuming take space too, as of the last sweep
+        incoming_size += self._part_bytes
+
+        # Leave 10% buffer
+        target = self.max_cache_size * 0.9 - incoming_size
+        while self.index.total_size > target:
+            key = self.index.least_recent()
+            if key is None:
+                break
+            self._evict(key)
+        self._schedule_index_flush()
+
+    def _evict(self, key: Tuple[str, str]):
+        show_id, filename = key
+        self.index.remove(key)
+        try:
+            self._cache_path(show_id, filename).unlink(missing_ok=True)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error evicting {show_id}/{filename}: {e}")
+
+    def _cache_path(self, show_id: str, filename: str) -> Path:
+        """
+        Resolve the cache location for a track: exactly <cache_dir>/<show_id>/<filename>.
+
+        Dot names, path separators, and the suffixes used for part files and
+        the index's temp file are refused, so the index, metadata database and
+        unfinished downloads are never served or evicted as tracks, and each
+        track has exactly one index key.
+        """
+        for name in (show_id, filename):
+            if (not name or name.startswith('.') or '/' in name or '\\' in name
+                    or name.endswith(UNSERVABLE_SUFFIXES)):
+                raise ValueError(f"Invalid cache path: {show_id}/{filename}")
+        cache_path = (self.cache_dir / show_id / filename).resolve()
+        if cache_path.parent.parent != self.cache_dir.resolve():
+            raise ValueError(f"Invalid cache path: {show_id}/{filename}")
+        return cache_path
 
     def get_cached_path(self, show_id: str, filename: str) -> str:
         """Get the path to a cached file if it exists"""
-        cache_path = self.cache_dir / show_id / filename
-        return str(cache_path) if cache_path.exists() else None
+        try:
+            cache_path = self._cache_path(show_id, filename)
+        except ValueError:
+            return None
+
+        key = (show_id, filename)
+        if not cache_path.is_file():
+            self.index.remove(key)
+            self._schedule_index_flush()
+            return None
+
+        # Count this as an access; files that predate the index are picked up here
+        self.index.touch(key, None if key in self.index else cache_path.stat().st_size)
+        self._schedule_index_flush()
+        return str(cache_path)
 
 class QueueManager:
-    def __init__(self):
+    def __init__(self, cache_manager: Optional[CacheManager] = None, track_source=None, prefetch_depth: int = None):
+        """
+        Args:
+            cache_manager: Cache to warm with upcoming tracks; prefetching is off without one
+            track_source: Object with an async get_track_filenames(show_id) used to find the rest of a set
+            prefetch_depth: Number of upcoming queue entries to prefetch
+        """
         self._queues = {}  # User-specific queues
+        self.cache_manager = cache_manager
+        self.track_source = track_source
+        self.prefetch_depth = get_settings().PREFETCH_DEPTH if prefetch_depth is None else prefetch_depth
         
     def create_queue(self, user_id: str):
         """Create a new queue for a user"""
@@ -88,7 +707,7 @@ class QueueManager:
                 'songs': []
             }
             
-    def add_to_queue(self, user_id: str, show_id: str, filename: str, position: int = None):
+    async def add_to_queue(self, user_id: str, show_id: str, filename: str, position: int = None):
         """Add a song to a user's queue"""
         if user_id not in self._queues:
             self.create_queue(user_id)
@@ -102,6 +721,8 @@ class QueueManager:
             self._queues[user_id]['songs'].append(song_info)
         else:
             self._queues[user_id]['songs'].insert(position, song_info)
+
+        await self._prefetch(user_id)
             
     def remove_from_queue(self, user_id: str, position: int):
         """Remove a song from a user's queue"""
@@ -109,12 +730,13 @@ class QueueManager:
             if 0 <= position < len(self._queues[user_id]['songs']):
                 self._queues[user_id]['songs'].pop(position)
                 
-    def get_next_song(self, user_id: str) -> dict:
+    async def get_next_song(self, user_id: str) -> dict:
         """Get the next song in the queue"""
         if user_id in self._queues:
             queue = self._queues[user_id]
             if queue['current_index'] < len(queue['songs']) - 1:
                 queue['current_index'] += 1
+                await self._prefetch(user_id)
                 return queue['songs'][queue['current_index']]
         return None
         
@@ -139,4 +761,50 @@ class QueueManager:
         """Get the current queue for a user"""
         if user_id in self._queues:
             return self._queues[user_id]['songs']
-        return []
\ No newline at end of file
+        return []
+
+    async def _prefetch(self, user_id: str):
+        """Warm the cache with the next few queued tracks and the rest of the current set"""
+        if self.cache_manager is None or user_id not in self._queues:
+            return
+
+        queue = self._queues[user_id]
+        start = max(queue['current_index'], 0)
+        upcoming = queue['songs'][start:start + self.prefetch_depth + 1]
+        tracks = [(song['show_id'], song['filename']) for song in upcoming]
+
+        if upcoming:
+            tracks.extend(await self._rest_of_set(upcoming[0]['show_id'], upcoming[0]['filename']))
+
+        try:
+            self.cache_manager.prefetch(tracks)
+        except Exception as e:
+            logging.error(f"Error prefetching for {user_id}: {e}")
+
+    async def _rest_of_set(self, show_id: str, filename: str) -> List[Tuple[str, str]]:
+        """Tracks following filename in the same set of its show"""
+        if self.track_source is None:
+            return []
+
+        try:
+            filenames = await self.track_source.get_track_filenames(show_id)
+        except Exception as e:
+            logging.error(f"Error listing tracks for {show_id}: {e}")
+            return []
+
+        if filename not in filenames:
+            return []
+        following = filenames[filenames.index(filename) + 1:]
+
+        current_set = SET_TRACK_PATTERN.search(filename)
+        if current_set is None:
+            # No set marker to go on, so only look a few tracks ahead
+            return [(show_id, name) for name in following[:self.prefetch_depth]]
+
+        rest = []
+        for name in following:
+            match = SET_TRACK_PATTERN.search(name)
+            if match is None or match.group(1) != current_set.group(1):
+                break
+            rest.append((show_id, name))
+        return rest
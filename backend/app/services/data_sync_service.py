@@ -9,18 +9,152 @@ from typing import Optional
 import os
 import re
 import csv
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+import requests
 
 # TODO: write script to strip location names from venues and add them as separate columns
 # TODO: move DB setup and DB-specific functionality to separate class
 
+COLLECTION_QUERY = "collection:TheJauntee"
+# Only the fields a show row needs, plus the timestamps used to detect changed items
+SHOW_FIELDS = ['identifier', 'date', 'venue', 'coverage', 'description', 'source', 'publicdate', 'updatedate']
+
+# Columns derived from the YYYY-MM-DD date so year and day-of-year lookups can be indexed
+GENERATED_SHOW_COLUMNS = {
+    'year': 'INTEGER GENERATED ALWAYS AS (CAST(substr(date, 1, 4) AS INTEGER)) VIRTUAL',
+    'month_day': 'TEXT GENERATED ALWAYS AS (substr(date, 6, 5)) VIRTUAL',
+}
+
+# Secondary indexes by name, so full rebuilds can drop and recreate them
+INDEXES = {
+    'idx_shows_date': 'CREATE INDEX IF NOT EXISTS idx_shows_date ON shows(date)',
+    'idx_shows_venue': 'CREATE INDEX IF NOT EXISTS idx_shows_venue ON shows(venue COLLATE NOCASE)',
+    'idx_shows_year': 'CREATE INDEX IF NOT EXISTS idx_shows_year ON shows(year)',
+    'idx_shows_month_day': 'CREATE INDEX IF NOT EXISTS idx_shows_month_day ON shows(month_day, date)',
+    'idx_tracks_name': 'CREATE INDEX IF NOT EXISTS idx_tracks_name ON tracks(name)',
+    'idx_tracks_show_id': 'CREATE INDEX IF NOT EXISTS idx_tracks_show_id ON tracks(show_id)',
+}
+# Indexes the loader's own statements rely on; kept while bulk loading
+LOAD_INDEXES = {'idx_tracks_show_id'}
+
+# Full-text index over tracks and shows. Track rows use the track's rowid and
+# show rows the negated show rowid, so both can be found again for deletes.
+SEARCH_INDEX_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS archive_fts USING fts5(
+        show_id UNINDEXED,
+        track_id UNINDEXED,
+        name,
+        title,
+        venue,
+        location,
+        description,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+
+def build_archive_summary(c) -> dict:
+    """Landing-page numbers for the archive: years, venues and totals"""
+    years = [
+        {'year': year, 'show_count': count}
+        for year, count in c.execute('''
+            SELECT year, COUNT(*) FROM shows
+            WHERE year IS NOT NULL
+            GROUP BY year
+            ORDER BY year DESC
+        ''')
+    ]
+    venues = [
+        {'venue': venue, 'show_count': count, 'first_show': first, 'last_show': last}
+        for venue, count, first, last in c.execute('''
+            SELECT venue, COUNT(*) AS show_count, MIN(date), MAX(date)
+            FROM shows
+            WHERE venue IS NOT NULL
+            GROUP BY venue
+            ORDER BY show_count DESC
+        ''')
+    ]
+    total_tracks, total_duration = c.execute(
+        'SELECT COUNT(*), SUM(duration) FROM tracks'
+    ).fetchone()
+    return {
+        'years': years,
+        'venues': venues,
+        'total_shows': c.execute('SELECT COUNT(*) FROM shows').fetchone()[0],
+        'total_tracks': total_tracks,
+        'total_duration': total_duration
+    }
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Scrape run journal states. A run is resumable until it is complete.
+RUN_LISTING = 'listing'      # collection listing not yet fully journaled
+RUN_FETCHING = 'fetching'    # listing journaled, items being fetched
+RUN_FAILED = 'failed'        # finished with items left to retry
+RUN_COMPLETE = 'complete'
+
+ITEM_PENDING = 'pending'
+ITEM_DONE = 'done'
+ITEM_SKIPPED = 'skipped'     # unchanged since the last scrape
+ITEM_FAILED = 'failed'
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
 class ArchiveScraper:
-    def __init__(self, db_dir: str = "data"):
+    def __init__(
+        self,
+        db_dir: str = "data",
+        requests_per_second: float = 2.0,
+        max_in_flight: int = 4,
+        max_retries: int = 5,
+        batch_size: int = 500,
+        max_item_attempts: int = 3
+    ):
         """
         Initialize scraper with custom database directory
         
         Args:
             db_dir (str): Directory to store the database and logs
+            requests_per_second (float): Politeness budget for archive.org item requests
+            max_in_flight (int): Maximum concurrent item requests
+            max_retries (int): Retries for a request that fails with 429/5xx
+            batch_size (int): Track rows written per transaction
+            max_item_attempts (int): Runs an item may fail in before it is given up on
         """
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.max_item_attempts = max_item_attempts
+
+        # Retries are left to call_archive so it can honour Retry-After
+        self.session = ia.get_session()
+        self.session.mount_http_adapter(max_retries=0)
+
         # Create data directory if it doesn't exist
         self.data_dir = Path(db_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -77,14 +211,146 @@ class ArchiveScraper:
             )
         ''')
         
+        # Key/value bookkeeping for incremental syncs (watermark, last sync time)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        # Precomputed archive summary, one row, rebuilt at the end of every scrape
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS archive_summary (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER,
+                computed_at TEXT,
+                data TEXT
+            )
+        ''')
+
+        # Journal of scrape runs so an interrupted run can pick up where it stopped
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT,
+                force INTEGER,
+                started_at TEXT,
+                updated_at TEXT,
+                finished_at TEXT,
+                total INTEGER DEFAULT 0,
+                cursor INTEGER DEFAULT 0,
+                watermark TEXT
+            )
+        ''')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_run_items (
+                run_id INTEGER,
+                identifier TEXT,
+                position INTEGER,
+                version TEXT,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (run_id, identifier),
+                FOREIGN KEY (run_id) REFERENCES scrape_runs (id)
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_scrape_run_items_status ON scrape_run_items(run_id, status, position)')
+
+        # Archive-side modification time of each show, added after the original schema
+        columns = [row[1] for row in c.execute('PRAGMA table_xinfo(shows)')]
+        if 'archive_updated' not in columns:
+            c.execute('ALTER TABLE shows ADD COLUMN archive_updated TEXT')
+        for name, definition in GENERATED_SHOW_COLUMNS.items():
+            if name not in columns:
+                c.execute(f'ALTER TABLE shows ADD COLUMN {name} {definition}')
+
         # Create indexes for common queries
-        c.execute('CREATE INDEX IF NOT EXISTS idx_shows_date ON shows(date)')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_tracks_name ON tracks(name)')
-        c.execute('CREATE INDEX IF NOT EXISTS idx_tracks_show_id ON tracks(show_id)')
+        self.create_indexes(c)
+        self.setup_search_index(c)
 
         conn.commit()
         conn.close()
 
+    def setup_search_index(self, c):
+        """Create the full-text index, filling it from existing data the first time"""
+        exists = c.execute("SELECT 1 FROM sqlite_master WHERE name = 'archive_fts'").fetchone()
+        try:
+            c.execute(SEARCH_INDEX_SQL)
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5; search falls back to LIKE
+            logging.warning(f"Full-text search unavailable: {e}")
+            return
+        if not exists:
+            self.rebuild_search_index(c)
+
+    @staticmethod
+    def has_search_index(c) -> bool:
+        return c.execute("SELECT 1 FROM sqlite_master WHERE name = 'archive_fts'").fetchone() is not None
+
+    def rebuild_search_index(self, c):
+        """Repopulate the full-text index from the shows and tracks tables"""
+        c.execute('DELETE FROM archive_fts')
+        self.index_shows(c, [row[0] for row in c.execute('SELECT id FROM shows')])
+        logging.info("Rebuilt full-text search index")
+
+    def unindex_shows(self, c, show_ids: list):
+        """Remove shows and their current tracks from the full-text index"""
+        if not self.has_search_index(c):
+            return
+        rowids = []
+        for show_id in show_ids:
+            rowids.extend((-row[0],) for row in c.execute('SELECT rowid FROM shows WHERE id = ?', (show_id,)))
+            rowids.extend(c.execute('SELECT rowid FROM tracks WHERE show_id = ?', (show_id,)).fetchall())
+        c.executemany('DELETE FROM archive_fts WHERE rowid = ?', rowids)
+
+    def index_shows(self, c, show_ids: list):
+        """Add shows and their tracks, as currently stored, to the full-text index"""
+        if not self.has_search_index(c):
+            return
+        # Canonical title: the track name with set markers and segue arrows stripped
+        c.connection.create_function(
+            'sanitize_track', 1, lambda name: ArchiveScraper.sanitize_track(name) if name else name,
+            deterministic=True
+        )
+        params = [(show_id,) for show_id in show_ids]
+        c.executemany('''
+            INSERT INTO archive_fts (rowid, show_id, venue, location, description)
+            SELECT -rowid, id, venue, location, description FROM shows WHERE id = ?
+        ''', params)
+        c.executemany('''
+            INSERT INTO archive_fts (rowid, show_id, track_id, name, title, venue, location)
+            SELECT t.rowid, t.show_id, t.id, t.name, sanitize_track(t.name), s.venue, s.location
+            FROM tracks t JOIN shows s ON s.id = t.show_id
+            WHERE t.show_id = ?
+        ''', params)
+
+    def optimize_search_index(self, c):
+        """Merge the full-text index's segments after a large load"""
+        if self.has_search_index(c):
+            c.execute("INSERT INTO archive_fts (archive_fts) VALUES ('optimize')")
+
+    def create_indexes(self, c):
+        for sql in INDEXES.values():
+            c.execute(sql)
+
+    def drop_deferred_indexes(self, c):
+        """Drop indexes the loader doesn't need; rebuilding them once at the end is cheaper"""
+        for name in INDEXES:
+            if name not in LOAD_INDEXES:
+                c.execute(f'DROP INDEX IF EXISTS {name}')
+
+    @staticmethod
+    def configure_bulk_load(conn):
+        """Connection settings for large write bursts"""
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL keeps the database consistent on crash with NORMAL; only the last commits are at risk
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=-65536')  # 64 MiB
+        conn.execute('PRAGMA temp_store=MEMORY')
+
     def parse_date(self, date_str: Optional[str]) -> Optional[str]:
         """Parse date string from Archive.org metadata"""
         if not date_str:
@@ -107,92 +373,511 @@ class ArchiveScraper:
             name = name.split(' ', 1)[1]
         return name
 
-    def scrape_shows(self):
-        """Scrape all shows from Archive.org"""
+    def fetch_collection_metadata(self, query: str = COLLECTION_QUERY):
+        """
+        Page through the collection's show metadata in bulk.
+
+        Passing fields makes the internetarchive client use the scrape API,
+        which returns only those fields and pages with a cursor, so the whole
+        collection arrives in a handful of requests.
+        """
+        return ia.search_items(query, fields=SHOW_FIELDS)
+
+    @staticmethod
+    def archive_version(result: dict) -> Optional[str]:
+        """Latest of an item's updatedate/publicdate, used to tell if it changed"""
+        stamps = []
+        for field in ('updatedate', 'publicdate'):
+            value = result.get(field)
+            if isinstance(value, list):
+                stamps.extend(value)
+            elif value:
+                stamps.append(value)
+        return max(stamps) if stamps else None
+
+    def get_stored_versions(self, c) -> dict:
+        """Map of show id to the archive_updated value recorded at its last scrape"""
+        return dict(c.execute('SELECT id, archive_updated FROM shows').fetchall())
+
+    def get_sync_state(self, key: str) -> Optional[str]:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def set_sync_state(self, c, key: str, value: Optional[str]):
+        c.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def prune_missing_shows(self, c, live_ids: set) -> int:
+        """Delete shows (and their tracks) that are no longer in the collection"""
+        stored_ids = {row[0] for row in c.execute('SELECT id FROM shows')}
+        missing = sorted(stored_ids - live_ids)
+        self.unindex_shows(c, missing)
+        for show_id in missing:
+            c.execute('DELETE FROM tracks WHERE show_id = ?', (show_id,))
+            c.execute('DELETE FROM shows WHERE id = ?', (show_id,))
+            logging.info(f"Removed show no longer in the collection: {show_id}")
+        return len(missing)
+
+    def update_summary(self, c):
+        """Recompute the archive summary and bump its version"""
+        c.execute('''
+            INSERT INTO archive_summary (id, version, computed_at, data) VALUES (1, 1, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                version = version + 1,
+                computed_at = excluded.computed_at,
+                data = excluded.data
+        ''', (datetime.now().isoformat(), json.dumps(build_archive_summary(c))))
+
+    def call_archive(self, fn, *args, **kwargs):
+        """
+        Make a rate-limited archive.org call, retrying 429/5xx responses and
+        connection failures with jittered exponential backoff.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response = getattr(e, 'response', None)
+                status = response.status_code if response is not None else None
+                # An HTTP error without its response can't be told apart from a permanent one
+                retryable = status in RETRY_STATUSES or (
+                    status is None and not isinstance(e, requests.exceptions.HTTPError)
+                )
+                if not retryable or attempt == self.max_retries:
+                    raise
+
+                retry_after = response.headers.get('Retry-After') if response is not None else None
+                if retry_after and retry_after.isdigit():
+                    delay = int(retry_after)
+                else:
+                    delay = min(60, 2 ** attempt) * random.uniform(0.5, 1.5)
+                logging.warning(f"Archive request failed ({status or e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def run_pipeline(self, jobs, fetch, write, on_error=None):
+        """
+        Fetch items concurrently and hand each parsed result to a single writer.
+
+        Args:
+            jobs: Iterable of argument tuples for fetch
+            fetch: Runs on the thread pool; must not touch the database
+            write: Called on this thread with (job, result) for each finished fetch
+            on_error: Optionally called on this thread with (job, exception) when a job fails
+        """
+        def drain(futures):
+            for future in futures:
+                job = in_flight.pop(future)
+                try:
+                    write(job, future.result())
+                except Exception as e:
+                    logging.error(f"Error processing {job[0]}: {str(e)}")
+                    if on_error is not None:
+                        on_error(job, e)
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for job in jobs:
+                in_flight[pool.submit(fetch, *job)] = job
+                # Keep a bounded backlog so parsed results don't pile up in memory
+                if len(in_flight) >= self.max_in_flight * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    drain(done)
+            drain(as_completed(list(in_flight)))
+
+    def get_item(self, identifier: str):
+        """
+        Fetch an item from the metadata API.
+
+        ia.get_item re-raises HTTP errors without their response, which
+        hides the status call_archive needs to decide whether to retry, so
+        the metadata is fetched here and handed to the session to build the item.
+        """
+        url = f'{self.session.protocol}//{self.session.host}/metadata/{identifier}'
+        response = self.session.get(url, timeout=12)
+        response.raise_for_status()
+        metadata = response.json()
+        if not metadata:
+            # The metadata API answers 200 with an empty object for unknown items
+            raise LookupError(f"No such archive.org item: {identifier}")
+        return self.session.get_item(identifier, item_metadata=metadata)
+
+    def fetch_show(self, identifier: str, version: Optional[str]):
+        """Fetch one item and parse it into a show row and its track rows"""
+        item = self.call_archive(self.get_item, identifier)
+
+        show_row = (
+            item.identifier,
+            self.parse_date(item.metadata.get('date')),
+            item.metadata.get('venue'),
+            item.metadata.get('coverage'),
+            item.metadata.get('description'),
+            item.metadata.get('source'),
+            json.dumps(item.metadata),
+            datetime.now().isoformat(),
+            version
+        )
+
+        track_rows = []
+        track_number = 1
+        for file in item.get_files():
+            # File Formats: VBR MP3, Flac, 
+            if file.format == 'VBR MP3':
+                track_rows.append((
+                    f"{item.identifier}/{file.name}",
+                    item.identifier,
+                    self.clean_track_name(file.title),
+                    file.length if file.length else None,
+                    file.size,
+                    file.format,
+                    file.bitrate,
+                    track_number
+                ))
+                track_number += 1
+
+        return show_row, track_rows
+
+    def write_shows(self, c, parsed: list):
+        """Replace a batch of shows and their tracks with one executemany per statement"""
+        show_rows = [show_row for show_row, _ in parsed]
+        show_ids = [show_row[0] for show_row in show_rows]
+        self.unindex_shows(c, show_ids)
+
+        c.executemany('''
+            INSERT OR REPLACE INTO shows 
+            (id, date, venue, location, description, source, metadata, last_updated, archive_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', show_rows)
+
+        # Files can be removed or renamed between versions of an item
+        c.executemany('DELETE FROM tracks WHERE show_id = ?', [(show_id,) for show_id in show_ids])
+
+        c.executemany('''
+            INSERT OR REPLACE INTO tracks 
+            (id, show_id, name, duration, size, format, bitrate, track_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [track_row for _, track_rows in parsed for track_row in track_rows])
+
+        self.index_shows(c, show_ids)
+
+    def get_resumable_run(self, c) -> Optional[tuple]:
+        """
+        Latest run that was interrupted before it finished, as (id, status, force).
+
+        A run that finished with failed items isn't resumed: the next run lists
+        the collection again and carries those items over (see journal_listing).
+        """
+        return c.execute('''
+            SELECT id, status, force FROM scrape_runs
+            WHERE status IN (?, ?)
+            ORDER BY id DESC LIMIT 1
+        ''', (RUN_LISTING, RUN_FETCHING)).fetchone()
+
+    @staticmethod
+    def is_permanent_error(error: Exception) -> bool:
+        """Whether retrying an item can't help: it's gone, or archive.org refused it with a 4xx"""
+        if isinstance(error, LookupError):
+            return True
+        response = getattr(error, 'response', None)
+        status = response.status_code if response is not None else None
+        return status is not None and 400 <= status < 500 and status not in RETRY_STATUSES
+
+    def get_run_with_failures(self, c) -> Optional[tuple]:
+        """Latest run with failed items, including ones it gave up on, as (id, status, force)"""
+        return c.execute('''
+            SELECT id, status, force FROM scrape_runs
+            WHERE id IN (SELECT run_id FROM scrape_run_items WHERE status = ?)
+            ORDER BY id DESC LIMIT 1
+        ''', (ITEM_FAILED,)).fetchone()
+
+    def start_run(self, c, force: bool) -> int:
+        now = datetime.now().isoformat()
+        # Earlier runs are finished with; keep only their failed items for the next listing to carry over
+        c.execute('DELETE FROM scrape_run_items WHERE status != ?', (ITEM_FAILED,))
+        c.execute(
+            'INSERT INTO scrape_runs (status, force, started_at, updated_at) VALUES (?, ?, ?, ?)',
+            (RUN_LISTING, int(force), now, now)
+        )
+        return c.lastrowid
+
+    def get_run_progress(self, run_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Progress of a scrape run, the latest one by default.
+
+        Returns:
+            Dict of run status, cursor and item counts by status, or None if there are no runs
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if run_id is None:
+                row = conn.execute('SELECT MAX(id) FROM scrape_runs').fetchone()
+                run_id = row[0] if row else None
+            run = conn.execute(
+                'SELECT id, status, started_at, updated_at, finished_at, total, cursor, watermark FROM scrape_runs WHERE id = ?',
+                (run_id,)
+            ).fetchone()
+            if run is None:
+                return None
+            counts = dict(conn.execute(
+                'SELECT status, COUNT(*) FROM scrape_run_items WHERE run_id = ? GROUP BY status', (run_id,)
+            ).fetchall())
+        finally:
+            conn.close()
+
+        keys = ('id', 'status', 'started_at', 'updated_at', 'finished_at', 'total', 'cursor', 'watermark')
+        return dict(zip(keys, run), items=counts)
+
+    def journal_listing(self, c, run_id: int, force: bool) -> Optional[str]:
+        """
+        Record every item in the collection against the run, marking the ones
+        that need fetching as pending. Items already journaled by an earlier
+        attempt at this run keep their status. Items earlier runs failed on
+        are carried into this run with their attempt counts: as pending if
+        they have attempts left, otherwise still failed until the item
+        changes on archive.org.
+
+        Returns:
+            The collection watermark (latest archive-side modification time)
+        """
+        stored_versions = self.get_stored_versions(c)
+        carried = {
+            identifier: (version, attempts, error)
+            for identifier, version, attempts, error in c.execute('''
+                SELECT identifier, version, attempts, error FROM scrape_run_items
+                WHERE run_id != ? AND status = ?
+            ''', (run_id, ITEM_FAILED))
+        }
+        watermark = None
+        rows = []
+        now = datetime.now().isoformat()
+        for position, result in enumerate(self.fetch_collection_metadata(), start=1):
+            identifier = result['identifier']
+            version = self.archive_version(result)
+            if version is not None and (watermark is None or version > watermark):
+                watermark = version
+
+            status, attempts, error = ITEM_PENDING, 0, None
+            if identifier in carried:
+                failed_version, failed_attempts, failed_error = carried[identifier]
+                if failed_attempts < self.max_item_attempts:
+                    attempts, error = failed_attempts, failed_error
+                elif failed_version == version:
+                    status, attempts, error = ITEM_FAILED, failed_attempts, failed_error
+            elif not force and version is not None and stored_versions.get(identifier) == version:
+                status = ITEM_SKIPPED
+            rows.append((run_id, identifier, position, version, status, attempts, error, now))
+
+        with c.connection:
+            c.executemany('''
+                INSERT OR IGNORE INTO scrape_run_items
+                (run_id, identifier, position, version, status, attempts, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            # Carried items now live in this run; ones that left the collection go with them
+            c.executemany(
+                'DELETE FROM scrape_run_items WHERE run_id != ? AND identifier = ? AND status = ?',
+                [(run_id, identifier, ITEM_FAILED) for identifier in carried]
+            )
+            c.execute(
+                'UPDATE scrape_runs SET status = ?, total = ?, watermark = ?, updated_at = ? WHERE id = ?',
+                (RUN_FETCHING, len(rows), watermark, now, run_id)
+            )
+        return watermark
+
+    def update_cursor(self, c, run_id: int):
+        """Advance the run cursor past the leading items that no longer need work"""
+        row = c.execute('''
+            SELECT MIN(position) FROM scrape_run_items
+            WHERE run_id = ? AND status IN (?, ?)
+        ''', (run_id, ITEM_PENDING, ITEM_FAILED)).fetchone()
+        if row[0] is None:
+            cursor_sql = '(SELECT total FROM scrape_runs WHERE id = ?)'
+            params = (run_id,)
+        else:
+            cursor_sql = '?'
+            params = (row[0] - 1,)
+        c.execute(
+            f'UPDATE scrape_runs SET cursor = {cursor_sql}, updated_at = ? WHERE id = ?',
+            params + (datetime.now().isoformat(), run_id)
+        )
+
+    def scrape_shows(self, force: bool = False, resume: bool = True, retry_failed_only: bool = False):
+        """
+        Incrementally sync all shows from Archive.org
+
+        Compares each item's archive-side modification time with what was
+        stored at the last sync, fetches only new or changed items, deletes
+        shows that have left the collection and records a sync watermark.
+        Items are fetched concurrently within the rate limit while this
+        thread writes them in batches of about batch_size track rows, one
+        transaction per batch.
+
+        Each run is journaled in scrape_runs/scrape_run_items: items are
+        marked done in the same transaction that writes them, so a run that
+        dies part way is resumed by the next call without refetching
+        finished items. Failed items keep their error and are carried into
+        the next run until they have failed max_item_attempts times; items
+        that are gone or refused with a 4xx are given up on straight away.
+
+        Args:
+            force (bool): Refetch every item, even ones that haven't changed.
+                Secondary indexes are dropped for the load and rebuilt after.
+            resume (bool): Continue the latest interrupted run instead of starting a new one
+            retry_failed_only (bool): Only retry the failed items of the latest run
+                that has any, regardless of attempts, leaving pending items alone
+        """
         logging.info("Starting show scraping process...")
         
         conn = sqlite3.connect(self.db_path)
+        self.configure_bulk_load(conn)
         c = conn.cursor()
 
-        query = "collection:TheJauntee"
+        if retry_failed_only:
+            run = self.get_run_with_failures(c)
+        else:
+            run = self.get_resumable_run(c) if resume else None
+        if run is not None:
+            run_id, status, run_force = run
+            force = bool(run_force)
+            logging.info(f"Resuming scrape run {run_id} ({status})")
+        elif retry_failed_only:
+            logging.info("No scrape run has failed items to retry")
+            conn.close()
+            return
+        else:
+            with conn:
+                run_id = self.start_run(c, force)
+            status = RUN_LISTING
+            logging.info(f"Started scrape run {run_id}")
+
         print(f"Scraping all J-Boy shows")
-        search = ia.search_items(query, params={'rows': 1000})
+        try:
+            if force:
+                self.drop_deferred_indexes(c)
 
-        count = 0
-        
-        for result in search:
-            try:
-                count += 1
-                print(f"Searching show #{count}")
-                item = ia.get_item(result['identifier'])
-                
-                show_data = {
-                    'id': item.identifier,
-                    'date': self.parse_date(item.metadata.get('date')),
-                    'venue': item.metadata.get('venue'),
-                    'location': item.metadata.get('coverage'),
-                    'description': item.metadata.get('description'),
-                    'source': item.metadata.get('source'),
-                    'metadata': json.dumps(item.metadata)
-                }
-                
-                c.execute('''
-                    INSERT OR REPLACE INTO shows 
-                    (id, date, venue, location, description, source, metadata, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    show_data['id'],
-                    show_data['date'],
-                    show_data['venue'],
-                    show_data['location'],
-                    show_data['description'],
-                    show_data['source'],
-                    show_data['metadata'],
-                    datetime.now().isoformat()
-                ))
+            if status == RUN_LISTING:
+                watermark = self.journal_listing(c, run_id, force)
+            else:
+                watermark = c.execute('SELECT watermark FROM scrape_runs WHERE id = ?', (run_id,)).fetchone()[0]
+
+            retry_statuses = (ITEM_FAILED,) if retry_failed_only else (ITEM_PENDING, ITEM_FAILED)
+            max_attempts = None if retry_failed_only else self.max_item_attempts
+            jobs = [
+                (identifier, version) for identifier, version, status, attempts in c.execute('''
+                    SELECT identifier, version, status, attempts FROM scrape_run_items
+                    WHERE run_id = ?
+                    ORDER BY position
+                ''', (run_id,))
+                if status in retry_statuses and (max_attempts is None or attempts < max_attempts)
+            ]
+            total, cursor = c.execute('SELECT total, cursor FROM scrape_runs WHERE id = ?', (run_id,)).fetchone()
+            logging.info(f"Run {run_id}: {len(jobs)} of {total} items to fetch, cursor at {cursor}")
+
+            stats = {'fetched': 0, 'failed': 0}
+            started = time.monotonic()
+            batch = []
+            failures = []
+
+            def flush():
+                if not batch and not failures:
+                    return
+                now = datetime.now().isoformat()
+                with conn:
+                    if batch:
+                        self.write_shows(c, batch)
+                        c.executemany(
+                            'UPDATE scrape_run_items SET status = ?, error = NULL, updated_at = ? WHERE run_id = ? AND identifier = ?',
+                            [(ITEM_DONE, now, run_id, show_row[0]) for show_row, _ in batch]
+                        )
+                    if failures:
+                        # Permanent failures jump straight to max_item_attempts
+                        c.executemany(
+                            'UPDATE scrape_run_items SET status = ?, attempts = MAX(attempts + 1, ?), error = ?, updated_at = ? WHERE run_id = ? AND identifier = ?',
+                            [(ITEM_FAILED, min_attempts, error, now, run_id, identifier)
+                             for identifier, min_attempts, error in failures]
+                        )
+                    self.update_cursor(c, run_id)
+                stats['fetched'] += len(batch)
+                stats['failed'] += len(failures)
+                batch.clear()
+                failures.clear()
+
+                settled = stats['fetched'] + stats['failed']
+                rate = settled / max(time.monotonic() - started, 1e-9)
+                eta = (len(jobs) - settled) / rate if rate else 0
+                logging.info(
+                    f"Run {run_id}: {settled}/{len(jobs)} items ({stats['failed']} failed), "
+                    f"{rate:.1f} items/s, ETA {eta:.0f}s"
+                )
+
+            def write(job, parsed):
+                batch.append(parsed)
+                if sum(len(track_rows) for _, track_rows in batch) >= self.batch_size:
+                    flush()
+
+            def on_error(job, error):
+                min_attempts = self.max_item_attempts if self.is_permanent_error(error) else 0
+                failures.append((job[0], min_attempts, str(error) or type(error).__name__))
 
-                track_number = 1
-                for file in item.get_files():
-                    # File Formats: VBR MP3, Flac, 
-                    if file.format == 'VBR MP3':
-                        track_data = {
-                            'id': f"{show_data['id']}/{file.name}",
-                            'show_id': show_data['id'],
-                            'name': self.clean_track_name(file.title),
-                            'duration': file.length if file.length else None,
-                            'size': file.size,
-                            'format': file.format,
-                            'bitrate': file.bitrate,
-                            'track_number': track_number
-                        }
-                        
-                        c.execute('''
-                            INSERT OR REPLACE INTO tracks 
-                            (id, show_id, name, duration, size, format, bitrate, track_number)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            track_data['id'],
-                            track_data['show_id'],
-                            track_data['name'],
-                            track_data['duration'],
-                            track_data['size'],
-                            track_data['format'],
-                            track_data['bitrate'],
-                            track_data['track_number']
-                        ))
-                        
-                        track_number += 1
+            self.run_pipeline(jobs, self.fetch_show, write, on_error)
+            flush()
 
+            remaining = c.execute('''
+                SELECT COUNT(*) FROM scrape_run_items
+                WHERE run_id = ? AND (status = ? OR (status = ? AND attempts < ?))
+            ''', (run_id, ITEM_PENDING, ITEM_FAILED, self.max_item_attempts)).fetchone()[0]
+            given_up = c.execute(
+                'SELECT COUNT(*) FROM scrape_run_items WHERE run_id = ? AND status = ?',
+                (run_id, ITEM_FAILED)
+            ).fetchone()[0] if not remaining else 0
+
+            deleted = 0
+            if not retry_failed_only:
+                # The listing was journaled in full, so a missing id really is gone
+                live_ids = {row[0] for row in c.execute('SELECT identifier FROM scrape_run_items WHERE run_id = ?', (run_id,))}
+                deleted = self.prune_missing_shows(c, live_ids) if live_ids else 0
+                self.set_sync_state(c, 'watermark', watermark)
+                self.set_sync_state(c, 'last_sync', datetime.now().isoformat())
+            self.update_summary(c)
+
+            now = datetime.now().isoformat()
+            if remaining:
+                c.execute(
+                    'UPDATE scrape_runs SET status = ?, updated_at = ? WHERE id = ?',
+                    (RUN_FAILED, now, run_id)
+                )
+            else:
+                c.execute(
+                    'UPDATE scrape_runs SET status = ?, updated_at = ?, finished_at = ? WHERE id = ?',
+                    (RUN_COMPLETE, now, now, run_id)
+                )
+            conn.commit()
+        finally:
+            if force:
+                self.create_indexes(c)
+                self.optimize_search_index(c)
                 conn.commit()
-                logging.info(f"Processed show: {show_data['id']}")
-                time.sleep(1)
-                
-            except Exception as e:
-                logging.error(f"Error processing show {result['identifier']}: {str(e)}")
-                continue
+            conn.close()
 
-        conn.close()
-        logging.info("Completed show scraping process")
+        logging.info(
+            f"Finished scrape run {run_id}: {total} shows, {stats['fetched']} fetched, "
+            f"{stats['failed']} failed, {deleted} removed, watermark {watermark}"
+            + (f", {remaining} items left to retry" if remaining else "")
+            + (f", gave up on {given_up} items" if given_up else "")
+        )
+
+    def retry_failed(self):
+        """Retry just the failed items of the latest scrape run that has any"""
+        self.scrape_shows(retry_failed_only=True)
+
+    def fetch_file_titles(self, identifier: str) -> list:
+        """Titles of an item's MP3/FLAC files, in file order"""
+        item = self.call_archive(self.get_item, identifier)
+        return [
+            file.title for file in item.get_files()
+            if hasattr(file, 'title') and (file.format == 'VBR MP3' or file.format == 'Flac')
+        ]
 
     def tracks_csv(self):
         logging.info("Writing tracks to CSV")
@@ -202,21 +887,16 @@ class ArchiveScraper:
             writer.writeheader()
         
             query = "collection:TheJauntee"
-            search = ia.search_items(query, params={'rows': 1000})
-        
-            for result in search:
-                try:
-                    item = ia.get_item(result['identifier'])
-                    
-                    for file in item.get_files():
-                        if hasattr(file, 'title') and (file.format == 'VBR MP3' or file.format == 'Flac'):
-                            logging.info(f"Writing {file.title}")
-                            writer.writerow({
-                                'title': file.title
-                            })
-                        
-                except Exception as e:
-                    print(f"Error processing {result['identifier']}: {str(e)}")
+            search = ia.search_items(query, fields=['identifier'])
+
+            def write(job, titles):
+                for title in titles:
+                    logging.info(f"Writing {title}")
+                    writer.writerow({
+                        'title': title
+                    })
+
+            self.run_pipeline(((result['identifier'],) for result in search), self.fetch_file_titles, write)
     
     def scrape_tracks(self):
         """Scrape all unique track names and write to DB"""
@@ -227,42 +907,30 @@ class ArchiveScraper:
 
         query = "collection:TheJauntee AND year:2011"
         print(f"Scraping all J-Boy shows")
-        search = ia.search_items(query, params={'rows': 1000})
-
-        for result in search:
-            try:
-                item = ia.get_item(result['identifier'])
-
-                last_track = ''
-                
-                for file in item.get_files():
-                    if hasattr(file, 'title'):
-                        track_lowered = file.title.lower()
-                        track = ArchiveScraper.sanitize_track(file.title)
-                        if (file.format == 'VBR MP3' or file.format == 'Flac') and (track_lowered != last_track):
-                            last_track = track_lowered
-                            track_data = {
-                                'title': track
-                            }
-
-                            c.execute('''
-                                    INSERT OR REPLACE INTO track_titles
-                                    (title)
-                                    VALUES (?)
-                                    ''', (
-                                        track_data['title'],
-                                    ))
-                            
-                            logging.info(f'Processed {track_data['title']}')
+        search = ia.search_items(query, fields=['identifier'])
 
-                conn.commit()
-                time.sleep(1)
+        def write(job, titles):
+            last_track = ''
+            rows = []
+            for title in titles:
+                track_lowered = title.lower()
+                if track_lowered == last_track:
+                    continue
+                last_track = track_lowered
+                rows.append((ArchiveScraper.sanitize_track(title),))
 
-            except Exception as e:
-                logging.error(f"Error processing show {result['identifier']}: {str(e)}")
-                continue
+            with conn:
+                c.executemany('''
+                        INSERT OR REPLACE INTO track_titles
+                        (title)
+                        VALUES (?)
+                        ''', rows)
+            logging.info(f'Processed {len(rows)} titles from {job[0]}')
 
-        conn.close()
+        try:
+            self.run_pipeline(((result['identifier'],) for result in search), self.fetch_file_titles, write)
+        finally:
+            conn.close()
         logging.info("Completed track scraping process")
     
     def sanitize_track(title: str) -> str:
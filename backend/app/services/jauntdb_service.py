@@ -1,7 +1,51 @@
+import re
+import json
 import sqlite3
+import datetime
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import logging
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..core.config import get_settings
+from ..db.sqlite_pool import SQLitePool
+from .data_sync_service import GENERATED_SHOW_COLUMNS, INDEXES, build_archive_summary
+
+SHOW_COLUMNS = ('id', 'date', 'venue', 'location', 'description', 'source', 'metadata', 'last_updated', 'year')
+SHOW_SEARCH_FIELDS = ('id', 'date', 'venue', 'location', 'description')
+
+# bm25 column weights for archive_fts: show_id, track_id, name, title, venue, location, description
+SEARCH_WEIGHTS = (0.0, 0.0, 10.0, 8.0, 3.0, 2.0, 1.0)
+
+def date_range(year: int, month: Optional[int] = None) -> Tuple[str, str]:
+    """
+    Half-open [start, end) date bounds for a year or one month of it.
+    Comparing the date column against these can use idx_shows_date.
+    """
+    if month is None:
+        return f'{year:04d}-01-01', f'{year + 1:04d}-01-01'
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {month}")
+    if month == 12:
+        return f'{year:04d}-12-01', f'{year + 1:04d}-01-01'
+    return f'{year:04d}-{month:02d}-01', f'{year:04d}-{month + 1:02d}-01'
+
+def iso_date(value: str) -> str:
+    """Validate a YYYY-MM-DD date"""
+    return datetime.date.fromisoformat(value).isoformat()
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, and the last
+    one matches as a prefix so results update while the user is typing.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
 
 class JauntDBService:
     def __init__(self, db_dir: str = "data"):
@@ -11,8 +55,16 @@ class JauntDBService:
 
         self.db_path = self.data_dir / "jauntee_archive.db"
         self.log_path = self.data_dir / "db_service.log"
+        self.pool = SQLitePool(self.db_path)
+
+        self._search_index = None
+        self._summary: Optional[Dict] = None
 
         self.setup_logging()
+        self.ensure_indexes()
+
+    def close(self):
+        self.pool.close()
 
     def setup_logging(self):
         logging.basicConfig(
@@ -24,164 +76,423 @@ class JauntDBService:
             ]
         )
 
-    def get_years(self, order='DESC') -> List[Dict]:
-        c = self.create_cursor(True)
-        
-        years = []
-        result = c.execute(f'''
-                SELECT date
-                FROM shows
-                ORDER BY date {order};
-                  ''').fetchall()
-        
-        print(f'Row keys: {result.keys()}')
-        for row in result:
-            years.append(row)
-            
-        
-        return result
+    def ensure_indexes(self):
+        """Create the indexes the API queries rely on, if the archive tables exist yet"""
+        try:
+            with self.pool.writer() as conn:
+                columns = [row[1] for row in conn.execute('PRAGMA table_xinfo(shows)')]
+                for name, definition in GENERATED_SHOW_COLUMNS.items():
+                    if name not in columns:
+                        conn.execute(f'ALTER TABLE shows ADD COLUMN {name} {definition}')
+                for name in ('idx_shows_date', 'idx_shows_venue', 'idx_shows_year', 'idx_shows_month_day'):
+                    conn.execute(INDEXES[name])
+        except sqlite3.OperationalError as e:
+            logging.warning(f"Skipping index setup, archive database not populated: {e}")
+
+    def has_search_index(self) -> bool:
+        """Whether the scraper has built the full-text index (needs SQLite with FTS5)"""
+        if not self._search_index:
+            with self.pool.reader() as conn:
+                self._search_index = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'archive_fts'"
+                ).fetchone() is not None
+        return self._search_index
+
+    def has_shows(self) -> bool:
+        """Whether the archive database has any shows in it yet"""
+        try:
+            with self.pool.reader() as conn:
+                return conn.execute('SELECT 1 FROM shows LIMIT 1').fetchone() is not None
+        except sqlite3.OperationalError:
+            return False
+
+    def get_summary(self) -> Dict:
+        """
+        Years with show counts, venue stats and totals, as computed at the end
+        of the last scrape. Served from memory; reloaded only when the stored
+        version changes, which costs one primary-key lookup per call.
+
+        Returns:
+            The summary dict plus its 'version' and 'computed_at'
+        """
+        with self.pool.reader() as conn:
+            try:
+                row = conn.execute('SELECT version FROM archive_summary WHERE id = 1').fetchone()
+            except sqlite3.OperationalError:
+                row = None
+
+            if row is None:
+                # Scraped before summaries existed; compute one without persisting it
+                if self._summary is None or self._summary['version'] is not None:
+                    try:
+                        summary = build_archive_summary(conn)
+                    except sqlite3.OperationalError:
+                        # Nothing scraped yet
+                        summary = {'years': [], 'venues': [], 'total_shows': 0, 'total_tracks': 0, 'total_duration': None}
+                    self._summary = dict(summary, version=None, computed_at=None)
+            elif self._summary is None or self._summary['version'] != row['version']:
+                stored = conn.execute(
+                    'SELECT version, computed_at, data FROM archive_summary WHERE id = 1'
+                ).fetchone()
+                self._summary = dict(
+                    json.loads(stored['data']), version=stored['version'], computed_at=stored['computed_at']
+                )
+        return self._summary
+
+    def get_years(self, order='DESC') -> List[int]:
+        """Distinct years that have shows"""
+        if order.upper() not in ('ASC', 'DESC'):
+            raise ValueError(f"Invalid sort order: {order}")
+
+        with self.pool.reader() as conn:
+            result = conn.execute(f'''
+                    SELECT DISTINCT year
+                    FROM shows
+                    WHERE year IS NOT NULL
+                    ORDER BY year {order.upper()};
+                      ''').fetchall()
+
+        return [row['year'] for row in result]
         
     def load_show_data(self) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        """Every show with its track names; prefer iter_show_data for the whole archive"""
+        return list(self.iter_show_data())
+
+    def iter_show_data(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Yield each show with its track names, in show id order, as the cursor
+        advances. Memory stays bounded by batch_size rows plus one show.
+
+        The generator holds this thread's read connection until it is
+        exhausted or closed, so consume it on the thread that created it.
+
+        Args:
+            batch_size: Rows fetched from SQLite at a time
+        """
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT shows.id, shows.date, tracks.name AS track_name
+                FROM shows
+                LEFT JOIN tracks ON shows.id = tracks.show_id
+                ORDER BY shows.id, tracks.track_number
+            ''')
+            try:
+                yield from self._group_show_rows(iter(lambda: cursor.fetchmany(batch_size), []))
+            finally:
+                cursor.close()
+
+    def iter_track_names(self) -> Iterator[str]:
+        """Yield each distinct track name in the archive"""
+        with self.pool.reader() as conn:
+            cursor = conn.execute('SELECT DISTINCT name FROM tracks WHERE name IS NOT NULL')
+            try:
+                for row in cursor:
+                    yield row[0]
+            finally:
+                cursor.close()
+
+    def get_show_data_page(self, after: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of shows with their track names, keyset-paginated on show id.
+
+        Args:
+            after: Show id the previous page ended on; None for the first page
+            limit: Shows per page
 
-        result = c.execute('''
-                           SELECT shows.id, tracks.name AS track_name 
-                           FROM shows 
-                           LEFT JOIN tracks ON shows.id = tracks.show_id 
-                           ORDER BY shows.id, tracks.track_number;
-                           ''')
+        Returns:
+            Tuple of (shows, id to pass as after for the next page, or None at the end)
+        """
+        with self.pool.reader() as conn:
+            rows = conn.execute('''
+                SELECT shows.id, shows.date, tracks.name AS track_name
+                FROM (
+                    SELECT id, date FROM shows
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ) AS shows
+                LEFT JOIN tracks ON shows.id = tracks.show_id
+                ORDER BY shows.id, tracks.track_number
+            ''', (after or '', limit)).fetchall()
 
-        shows_data = []
+        shows = list(self._group_show_rows([rows]))
+        next_after = shows[-1]['id'] if len(shows) == limit else None
+        return shows, next_after
+
+    @staticmethod
+    def _group_show_rows(batches) -> Iterator[Dict]:
+        """Fold (id, date, track_name) rows ordered by show into one dict per show"""
         current_show = None
-        
-        for row in result:
-            if current_show is None or current_show['id'] != row ['id']:
-                if current_show is not None:
-                    shows_data.append(current_show)
-                current_show = {
-                    'id': row['id'],
-                    'tracks': []
-                }
-
-            if row['track_name']:
-                current_show['tracks'].append({
-                    'name': row['track_name']
-                })
+        for rows in batches:
+            for row in rows:
+                if current_show is None or current_show['id'] != row['id']:
+                    if current_show is not None:
+                        yield current_show
+                    current_show = {
+                        'id': row['id'],
+                        'date': row['date'],
+                        'tracks': []
+                    }
 
-        if current_show is not None:
-            shows_data.append(current_show)
+                if row['track_name']:
+                    current_show['tracks'].append({
+                        'name': row['track_name']
+                    })
 
-        return shows_data
+        if current_show is not None:
+            yield current_show
     
     def get_stats(self):
         """Get statistics about the scraped data"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        with self.pool.reader() as conn:
+            stats = {
+                'total_shows': conn.execute('SELECT COUNT(*) FROM shows').fetchone()[0],
+                'total_tracks': conn.execute('SELECT COUNT(*) FROM tracks').fetchone()[0],
+                # Separate subqueries so each MIN/MAX is a single lookup on idx_shows_year
+                'years_covered': tuple(conn.execute(
+                    'SELECT (SELECT MIN(year) FROM shows), (SELECT MAX(year) FROM shows)'
+                ).fetchone()),
+                'total_duration': conn.execute('SELECT SUM(duration) FROM tracks WHERE duration IS NOT NULL').fetchone()[0]
+            }
         
-        stats = {
-            'total_shows': c.execute('SELECT COUNT(*) FROM shows').fetchone()[0],
-            'total_tracks': c.execute('SELECT COUNT(*) FROM tracks').fetchone()[0],
-            'years_covered': c.execute(
-                'SELECT MIN(substr(date,1,4)), MAX(substr(date,1,4)) FROM shows WHERE date IS NOT NULL'
-            ).fetchone(),
-            'total_duration': c.execute('SELECT SUM(duration) FROM tracks WHERE duration IS NOT NULL').fetchone()[0]
-        }
-        
-        conn.close()
         return stats
 
     def query_shows_by_year(self, year: int) -> List[Dict]:
         """Get all shows from a specific year"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # This enables column name access
-        c = conn.cursor()
-        
-        shows = c.execute('''
-            SELECT * FROM shows 
-            WHERE date LIKE ?
-            ORDER BY date ASC
-        ''', (f'{year}%',)).fetchall()
-        
-        result = [{key: show[key] for key in show.keys()} for show in shows]
-        conn.close()
-        return result
-
-    def search_tracks(self, song_name: str) -> List[Dict]:
-        """Search for tracks by name"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        return self._query_shows_between(*date_range(year))
+
+    def query_shows_by_month(self, year: int, month: int) -> List[Dict]:
+        """Get all shows from one month of a year"""
+        return self._query_shows_between(*date_range(year, month))
+
+    def query_shows_between(self, date_from: str, date_to: str) -> List[Dict]:
+        """Get all shows from date_from through date_to (inclusive, YYYY-MM-DD)"""
+        end = datetime.date.fromisoformat(date_to) + datetime.timedelta(days=1)
+        return self._query_shows_between(iso_date(date_from), end.isoformat())
+
+    def query_shows_on_this_day(self, month: int, day: int) -> List[Dict]:
+        """Get the shows played on a month and day in any year, oldest first"""
+        # Validate against a leap year so Feb 29 is allowed
+        datetime.date(2000, month, day)
+        with self.pool.reader() as conn:
+            shows = conn.execute('''
+                SELECT * FROM shows
+                WHERE month_day = ?
+                ORDER BY date ASC
+            ''', (f'{month:02d}-{day:02d}',)).fetchall()
+
+        return [{key: show[key] for key in show.keys()} for show in shows]
+
+    def _query_shows_between(self, start: str, end: str) -> List[Dict]:
+        """Shows with start <= date < end"""
+        with self.pool.reader() as conn:
+            shows = conn.execute('''
+                SELECT * FROM shows 
+                WHERE date >= ? AND date < ?
+                ORDER BY date ASC
+            ''', (start, end)).fetchall()
         
-        results = c.execute('''
-            SELECT t.*, s.date, s.venue, s.location
-            FROM tracks t
-            JOIN shows s ON t.show_id = s.id
-            WHERE t.name LIKE ?
-            ORDER BY s.date DESC
-        ''', (f'%{song_name}%',)).fetchall()
+        return [{key: show[key] for key in show.keys()} for show in shows]
+
+    def search_shows(
+        self,
+        year: Optional[int] = None,
+        venue: Optional[str] = None,
+        date: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        fields: Optional[List[str]] = None,
+        text: Optional[str] = None,
+        month: Optional[int] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        Search shows with index-friendly filters.
+
+        Args:
+            year: Shows in this year (range on the date index)
+            venue: Venue name prefix, case-insensitive
+            date: Exact show date, YYYY-MM-DD
+            limit: Page size
+            offset: Rows to skip
+            fields: Columns to return; defaults to SHOW_SEARCH_FIELDS
+            text: Words to find in the venue, location or description
+            month: Narrow a year down to one month
+            date_from: Earliest show date, YYYY-MM-DD
+            date_to: Latest show date, YYYY-MM-DD
+
+        Returns:
+            Tuple of (page of shows, total matching shows)
+        """
+        fields = fields or list(SHOW_SEARCH_FIELDS)
+        unknown = set(fields) - set(SHOW_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown show fields: {', '.join(sorted(unknown))}")
+
+        clauses = []
+        params = []
+        if month and not year:
+            raise ValueError("month requires year")
+        if year:
+            clauses.append('date >= ? AND date < ?')
+            params.extend(date_range(year, month))
+        if date_from:
+            clauses.append('date >= ?')
+            params.append(iso_date(date_from))
+        if date_to:
+            clauses.append('date <= ?')
+            params.append(iso_date(date_to))
+        if date:
+            clauses.append('date = ?')
+            params.append(date)
+        if venue:
+            # Prefix LIKE can use the NOCASE venue index
+            clauses.append("venue LIKE ? ESCAPE '\\'")
+            escaped = venue.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f'{escaped}%')
+        if text:
+            query = fts_query(text)
+            if query and self.has_search_index():
+                # Show rows in the full-text index have negative rowids
+                clauses.append('id IN (SELECT show_id FROM archive_fts WHERE archive_fts MATCH ? AND rowid < 0)')
+                params.append(query)
+            elif query:
+                clauses.append('(venue LIKE ? OR location LIKE ? OR description LIKE ?)')
+                params.extend([f'%{text}%'] * 3)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self.pool.reader() as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM shows {where}', params).fetchone()[0]
+            rows = conn.execute(f'''
+                SELECT {', '.join(fields)} FROM shows
+                {where}
+                ORDER BY date ASC, id ASC
+                LIMIT ? OFFSET ?
+            ''', params + [limit, offset]).fetchall()
+
+        return [{key: row[key] for key in row.keys()} for row in rows], total
+
+    def search_tracks(self, song_name: str, limit: int = 50) -> List[Dict]:
+        """
+        Search for tracks by name, best matches first.
+
+        Uses the full-text index when it exists: words match anywhere in the
+        track name, its canonical title or the show's venue/location, the last
+        word as a prefix. Each result carries a highlighted snippet.
+
+        Args:
+            song_name: Search text, e.g. what's been typed so far
+            limit: Maximum results
+        """
+        query = fts_query(song_name)
+        if query and self.has_search_index():
+            with self.pool.reader() as conn:
+                results = conn.execute(f'''
+                    SELECT t.*, s.date, s.venue, s.location,
+                        snippet(archive_fts, -1, '<b>', '</b>', '…', 10) AS snippet
+                    FROM archive_fts
+                    JOIN tracks t ON t.rowid = archive_fts.rowid
+                    JOIN shows s ON s.id = t.show_id
+                    WHERE archive_fts MATCH ? AND archive_fts.rowid > 0
+                    ORDER BY bm25(archive_fts, {', '.join(map(str, SEARCH_WEIGHTS))}), s.date DESC
+                    LIMIT ?
+                ''', (query, limit)).fetchall()
+            return [{key: row[key] for key in row.keys()} for row in results]
+
+        with self.pool.reader() as conn:
+            results = conn.execute('''
+                SELECT t.*, s.date, s.venue, s.location
+                FROM tracks t
+                JOIN shows s ON t.show_id = s.id
+                WHERE t.name LIKE ?
+                ORDER BY s.date DESC
+                LIMIT ?
+            ''', (f'%{song_name}%', limit)).fetchall()
         
-        tracks = [{key: row[key] for key in row.keys()} for row in results]
-        conn.close()
-        return tracks
+        return [{key: row[key] for key in row.keys()} for row in results]
 
     def get_show_details(self, show_id: str) -> Dict:
         """Get detailed information about a specific show including its tracks"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        with self.pool.reader() as conn:
+            show = conn.execute('SELECT * FROM shows WHERE id = ?', (show_id,)).fetchone()
+            if not show:
+                return None
+                
+            tracks = conn.execute('''
+                SELECT * FROM tracks 
+                WHERE show_id = ? 
+                ORDER BY track_number
+            ''', (show_id,)).fetchall()
         
-        show = c.execute('SELECT * FROM shows WHERE id = ?', (show_id,)).fetchone()
-        if not show:
-            return None
-            
-        tracks = c.execute('''
-            SELECT * FROM tracks 
-            WHERE show_id = ? 
-            ORDER BY track_number
-        ''', (show_id,)).fetchall()
-        
-        result = {
+        return {
             'show': {key: show[key] for key in show.keys()},
             'tracks': [{key: track[key] for key in track.keys()} for track in tracks]
         }
-        
-        conn.close()
-        return result
+
+    def get_track_filenames(self, show_id: str) -> List[str]:
+        """Get the archive filenames of a show's tracks in play order"""
+        with self.pool.reader() as conn:
+            rows = conn.execute('''
+                SELECT id FROM tracks
+                WHERE show_id = ?
+                ORDER BY track_number
+            ''', (show_id,)).fetchall()
+
+        # Track ids are stored as "<show_id>/<filename>"
+        return [row[0].split('/', 1)[-1] for row in rows]
 
     def get_venue_stats(self) -> List[Dict]:
         """Get statistics about performances at different venues"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        stats = c.execute('''
-            SELECT 
-                venue,
-                COUNT(*) as show_count,
-                MIN(date) as first_show,
-                MAX(date) as last_show
-            FROM shows
-            WHERE venue IS NOT NULL
-            GROUP BY venue
-            ORDER BY show_count DESC
-        ''').fetchall()
+        with self.pool.reader() as conn:
+            stats = conn.execute('''
+                SELECT 
+                    venue,
+                    COUNT(*) as show_count,
+                    MIN(date) as first_show,
+                    MAX(date) as last_show
+                FROM shows
+                WHERE venue IS NOT NULL
+                GROUP BY venue
+                ORDER BY show_count DESC
+            ''').fetchall()
         
-        result = [{
+        return [{
             'venue': row[0],
             'show_count': row[1],
             'first_show': row[2],
             'last_show': row[3]
         } for row in stats]
-        
-        conn.close()
-        return result
-    
-    def create_cursor(self, row=False):
-        conn = sqlite3.connect(self.db_path)
-        
-        if row == True:
-            conn.row_factory = sqlite3.Row
-        
-        c = conn.cursor()
-        
-        return c
\ No newline at end of file
+
+class AsyncJauntDBService:
+    """
+    Awaitable front for JauntDBService, for use from async request handlers.
+
+    Every method of the wrapped service is available as a coroutine that
+    runs on a dedicated thread pool, so queries don't block the event loop.
+    The pool's threads each keep their own read connection.
+    """
+
+    def __init__(self, service: JauntDBService, max_workers: Optional[int] = None):
+        self.service = service
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or get_settings().ARCHIVE_DB_WORKERS,
+            thread_name_prefix='jauntdb'
+        )
+
+    def __getattr__(self, name: str):
+        method = getattr(self.service, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.service.close()
@@ -0,0 +1,189 @@
+# app/services/metadata_cache.py
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import quote
+import aiohttp
+from ..core.config import get_settings
+
+ARCHIVE_METADATA_URL = "https://archive.org/metadata/{identifier}"
+ARCHIVE_COLLECTION = "TheJauntee"
+
+class ItemNotFound(Exception):
+    """Raised when archive.org has no item with the requested identifier in the collection"""
+
+def in_collection(data: Dict, collection: str = ARCHIVE_COLLECTION) -> bool:
+    """Whether an item's metadata document lists it in collection"""
+    collections = data.get('metadata', {}).get('collection', [])
+    if isinstance(collections, str):
+        collections = [collections]
+    return collection in collections
+
+class MetadataCache:
+    """
+    Two-tier cache of archive.org item metadata keyed by identifier.
+
+    Fresh entries are answered from memory, or from the SQLite tier after a
+    restart. Entries older than the TTL are revalidated with a conditional
+    request, and concurrent misses for the same item share one fetch. The
+    memory tier keeps the METADATA_MEMORY_ITEMS most recently used items,
+    and only items in the collection are cached at all.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None):
+        self.settings = get_settings()
+        self.ttl = self.settings.METADATA_TTL_SECONDS if ttl is None else ttl
+        cache_dir = Path(self.settings.CACHE_DIR)
+        cache_dir.mkdir(exist_ok=True)
+        self.db_path = Path(db_path) if db_path else cache_dir / "metadata.db"
+
+        self.memory_items = self.settings.METADATA_MEMORY_ITEMS
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.setup_database()
+
+    def setup_database(self):
+        """Create the disk tier table if it doesn't exist"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS item_metadata (
+                identifier TEXT PRIMARY KEY,
+                data TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def get_item(self, identifier: str) -> Dict:
+        """
+        Get the full metadata document (metadata, files, ...) for an item.
+
+        Raises:
+            ItemNotFound: If archive.org doesn't know the identifier
+        """
+        entry = self._memory.get(identifier)
+        if entry is not None:
+            self._memory.move_to_end(identifier)
+        else:
+            entry = await asyncio.to_thread(self._load, identifier)
+            if entry is not None:
+                self._remember(identifier, entry)
+
+        if entry is not None and time.time() - entry['fetched_at'] < self.ttl:
+            return entry['data']
+
+        # Coalesce concurrent misses/revalidations into a single request
+        task = self._pending.get(identifier)
+        if task is None:
+            task = asyncio.create_task(self._refresh(identifier, entry))
+            self._pending[identifier] = task
+            task.add_done_callback(lambda _: self._pending.pop(identifier, None))
+        return await asyncio.shield(task)
+
+    def _remember(self, identifier: str, entry: Dict):
+        """Put an entry in the memory tier, dropping the least recently used past the limit"""
+        self._memory[identifier] = entry
+        self._memory.move_to_end(identifier)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def invalidate(self, identifier: str):
+        """Drop an item from both tiers"""
+        self._memory.pop(identifier, None)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('DELETE FROM item_metadata WHERE identifier = ?', (identifier,))
+        conn.commit()
+        conn.close()
+
+    async def _refresh(self, identifier: str, entry: Optional[Dict]) -> Dict:
+        """Fetch an item, sending validators from a stale entry when we have one"""
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        url = ARCHIVE_METADATA_URL.format(identifier=quote(identifier))
+        try:
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    entry = dict(entry, fetched_at=time.time())
+                else:
+                    response.raise_for_status()
+                    data = await response.json()
+                    # The metadata API answers unknown identifiers with an empty document;
+                    # items from other collections aren't ours to cache
+                    if not data or 'metadata' not in data or not in_collection(data):
+                        raise ItemNotFound(identifier)
+                    entry = {
+                        'data': data,
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'fetched_at': time.time()
+                    }
+        except ItemNotFound:
+            raise
+        except Exception as e:
+            if entry is None:
+                raise
+            # Serving stale metadata beats failing the request
+            logging.warning(f"Revalidating {identifier} failed, serving stale metadata: {e}")
+            return entry['data']
+
+        self._remember(identifier, entry)
+        await asyncio.to_thread(self._store, identifier, entry)
+        return entry['data']
+
+    def _load(self, identifier: str) -> Optional[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            'SELECT data, etag, last_modified, fetched_at FROM item_metadata WHERE identifier = ?',
+            (identifier,)
+        ).fetchone()
+        conn.close()
+        data = json.loads(row[0]) if row else None
+        if data is None or not in_collection(data):
+            return None
+        return {
+            'data': data,
+            'etag': row[1],
+            'last_modified': row[2],
+            'fetched_at': row[3]
+        }
+
+    def _store(self, identifier: str, entry: Dict):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT OR REPLACE INTO item_metadata
+            (identifier, data, etag, last_modified, fetched_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            identifier,
+            json.dumps(entry['data']),
+            entry['etag'],
+            entry['last_modified'],
+            entry['fetched_at']
+        ))
+        conn.commit()
+        conn.close()
@@ -1,13 +1,13 @@
 # app/services/recently_played.py
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, desc, func, select
 from typing import List, Optional
 from ..db.models import RecentlyPlayed, Song, Show
 from ..core.config import get_settings
 
 class RecentlyPlayedService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.max_history = 50  # Maximum number of tracks to keep in history
         
@@ -20,23 +20,26 @@ class RecentlyPlayedService:
         )
         self.db.add(recently_played)
         
+        await self.db.flush()
+        
         # Get count of user's history
-        history_count = self.db.query(RecentlyPlayed)\
-            .filter(RecentlyPlayed.user_id == user_id)\
-            .count()
+        history_count = await self.db.scalar(
+            select(func.count(RecentlyPlayed.id))
+            .where(RecentlyPlayed.user_id == user_id)
+        )
             
         # If exceeded max history, remove oldest entries
         if history_count > self.max_history:
-            oldest_entries = self.db.query(RecentlyPlayed)\
-                .filter(RecentlyPlayed.user_id == user_id)\
+            oldest_ids = select(RecentlyPlayed.id)\
+                .where(RecentlyPlayed.user_id == user_id)\
                 .order_by(RecentlyPlayed.played_at)\
-                .limit(history_count - self.max_history)\
-                .all()
+                .limit(history_count - self.max_history)
             
-            for entry in oldest_entries:
-                self.db.delete(entry)
+            await self.db.execute(
+                delete(RecentlyPlayed).where(RecentlyPlayed.id.in_(oldest_ids))
+            )
                 
-        self.db.commit()
+        await self.db.commit()
         
     async def get_recently_played(
         self, 
@@ -45,7 +48,7 @@ class RecentlyPlayedService:
         days: Optional[int] = None
     ) -> List[dict]:
         """Get user's recently played songs with show information"""
-        query = self.db.query(
+        query = select(
             RecentlyPlayed,
             Song,
             Show
@@ -53,17 +56,17 @@ class RecentlyPlayedService:
             Song, RecentlyPlayed.song_id == Song.id
         ).join(
             Show, Song.show_id == Show.id
-        ).filter(
+        ).where(
             RecentlyPlayed.user_id == user_id
         )
         
         if days:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
-            query = query.filter(RecentlyPlayed.played_at >= cutoff_date)
+            query = query.where(RecentlyPlayed.played_at >= cutoff_date)
             
-        recently_played = query.order_by(
+        recently_played = (await self.db.execute(query.order_by(
             desc(RecentlyPlayed.played_at)
-        ).limit(limit).all()
+        ).limit(limit))).all()
         
         return [{
             'song': {
@@ -87,43 +90,45 @@ class RecentlyPlayedService:
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
         # Get total plays
-        total_plays = self.db.query(RecentlyPlayed)\
-            .filter(
+        total_plays = await self.db.scalar(
+            select(func.count(RecentlyPlayed.id))
+            .where(
                 RecentlyPlayed.user_id == user_id,
                 RecentlyPlayed.played_at >= cutoff_date
-            ).count()
+            )
+        )
             
         # Get most played songs
-        most_played_songs = self.db.query(
+        most_played_songs = (await self.db.execute(select(
             Song,
             func.count(RecentlyPlayed.id).label('play_count')
         ).join(
             RecentlyPlayed, RecentlyPlayed.song_id == Song.id
-        ).filter(
+        ).where(
             RecentlyPlayed.user_id == user_id,
             RecentlyPlayed.played_at >= cutoff_date
         ).group_by(
             Song.id
         ).order_by(
             desc('play_count')
-        ).limit(10).all()
+        ).limit(10))).all()
         
         # Get most played shows
-        most_played_shows = self.db.query(
+        most_played_shows = (await self.db.execute(select(
             Show,
             func.count(RecentlyPlayed.id).label('play_count')
         ).join(
             Song, Song.show_id == Show.id
         ).join(
             RecentlyPlayed, RecentlyPlayed.song_id == Song.id
-        ).filter(
+        ).where(
             RecentlyPlayed.user_id == user_id,
             RecentlyPlayed.played_at >= cutoff_date
         ).group_by(
             Show.id
         ).order_by(
             desc('play_count')
-        ).limit(10).all()
+        ).limit(10))).all()
         
         return {
             'total_plays': total_plays,
@@ -1,24 +1,112 @@
 from fuzzywuzzy import fuzz
 from fuzzywuzzy import process
 import pandas as pd
+import hashlib
 import json
-from typing import List, Dict, Tuple
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import csv
-from data_sync_service import ArchiveScraper
+from .jauntdb_service import JauntDBService
+from ..db.sqlite_pool import SQLitePool
+
+# Optional: bulk scoring of a whole batch of titles in native code
+try:
+    import numpy as np
+    from rapidfuzz import fuzz as rapid_fuzz
+    from rapidfuzz.process import cdist
+except ImportError:
+    np = None
+    cdist = None
+
+FUZZY_SCORE_CUTOFF = 75
+
+# Each pool worker's own matcher, built once by _init_match_worker
+_worker_matcher = None
+
+def _init_match_worker(master_titles: List[str], threshold: int, shortlist_size: int):
+    global _worker_matcher
+    _worker_matcher = SongMatcher(master_titles, threshold, shortlist_size)
+
+def _match_shard(shard_index: int, titles: List[str]):
+    """Match one shard in a pool worker; returns timings for throughput reporting"""
+    started = time.perf_counter()
+    # One scoring thread per process; the pool already spreads work across cores
+    _, matches, scores = _worker_matcher.match_titles(titles, cdist_workers=1)
+    return shard_index, os.getpid(), matches, scores, time.perf_counter() - started
 
 class SongMatcher:
-    def __init__(self, master_titles: List[str], threshold: int = 85):
+    def __init__(self, master_titles: List[str], threshold: int = 85, shortlist_size: int = 25):
         """
         Initialize the song matcher with a list of master song titles.
         
         Args:
             master_titles: List of correct song titles
             threshold: Minimum similarity score (0-100) to consider a match
+            shortlist_size: Candidates sharing the most trigrams with a title
+                that get fully scored; 0 scores the whole catalog
         """
         self.master_titles = master_titles
         self.threshold = threshold
         self.match_cache = {}  # Cache for performance optimization
+
+        # Normalize the catalog once: normalized title -> canonical title for
+        # exact hits, and the distinct normalized titles as fuzzy candidates
+        self.normalized_titles = {}
+        for title in master_titles:
+            self.normalized_titles.setdefault(self._preprocess_title(title), title)
+        self.candidates = dict(enumerate(self.normalized_titles))
+        self.candidate_titles = list(self.normalized_titles.values())
+
+        # Identifies the catalog (and cutoff) stored match decisions were scored against
+        catalog_hash = hashlib.sha1(str(FUZZY_SCORE_CUTOFF).encode())
+        for normalized, title in sorted(self.normalized_titles.items()):
+            catalog_hash.update(f"\0{normalized}\0{title}".encode())
+        self.catalog_version = catalog_hash.hexdigest()
+
+        # Trigram -> ids of the candidates containing it, for shortlisting
+        self.shortlist_size = shortlist_size
+        self.trigram_index = defaultdict(list)
+        self.candidate_trigram_counts = []
+        for candidate_id, normalized in self.candidates.items():
+            trigrams = self._trigrams(normalized)
+            self.candidate_trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self.trigram_index[trigram].append(candidate_id)
+        
+    @staticmethod
+    def _trigrams(title: str) -> set:
+        """Character trigrams of a normalized title, padded so word edges count"""
+        padded = f"  {title} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def shortlist(self, processed_title: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Ids of the candidates most similar to a normalized title by shared
+        trigrams (Dice coefficient), best first.
         
+        Args:
+            processed_title: Preprocessed title
+            limit: Maximum candidates; defaults to shortlist_size
+        """
+        limit = self.shortlist_size if limit is None else limit
+        trigrams = self._trigrams(processed_title)
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self.trigram_index.get(trigram, ()))
+        scored = sorted(
+            shared,
+            key=lambda candidate_id: (
+                -2 * shared[candidate_id] / (len(trigrams) + self.candidate_trigram_counts[candidate_id]),
+                candidate_id
+            )
+        )
+        return scored[:limit]
+        
+
     def _preprocess_title(self, title: str) -> str:
         """
         Preprocess a song title for better matching.
@@ -60,46 +148,225 @@ class SongMatcher:
         processed_source = self._preprocess_title(source_title)
         
         # Try exact match first
-        for master_title in self.master_titles:
-            if self._preprocess_title(master_title) == processed_source:
-                self.match_cache[source_title] = (master_title, 100)
-                return master_title, 100
+        master_title = self.normalized_titles.get(processed_source)
+        if master_title is not None:
+            self.match_cache[source_title] = (master_title, 100)
+            return master_title, 100
+        
+        use_shortlist = 0 < self.shortlist_size < len(self.candidates)
+        best_match, score = self._fuzzy_match(processed_source, use_shortlist)
         
-        # Use fuzzy matching
-        score_threshold=75
+        self.match_cache[source_title] = (best_match, score)
+        return best_match, score
+
+    def _fuzzy_match(self, processed_source: str, use_shortlist: bool = True) -> Tuple[Optional[str], int]:
+        """Best fuzzy match for a normalized title, scoring the shortlist or the whole catalog"""
+        if use_shortlist:
+            choices = {
+                candidate_id: self.candidates[candidate_id]
+                for candidate_id in self.shortlist(processed_source)
+            }
+        else:
+            choices = self.candidates
+
+        # Use fuzzy matching; candidates are already normalized, so skip fuzzywuzzy's processor
         matches = process.extractBests(
             processed_source,
-            [self._preprocess_title(t) for t in self.master_titles],
+            choices,
+            processor=None,
             scorer=fuzz.ratio,
-            score_cutoff=score_threshold,
+            score_cutoff=FUZZY_SCORE_CUTOFF,
             limit=3
         )
         
-        best_match_index = None
-        best_match = None
-        score = 0
-        
-        if matches:
-            # print(f"No matches meeting {score_threshold}%")
-            best_match_name = matches[0][0]  # Get index of best match
-            best_match = self.master_titles.index(best_match_name)
-            score = matches[0][1]
+        if not matches:
+            return None, 0
+        # Dict choices come back as (normalized title, score, candidate index)
+        _, score, best_match_index = matches[0]
+        return self.candidate_titles[best_match_index], score
+
+    def match_titles(
+        self,
+        source_titles: Iterable[str],
+        chunk_size: int = 2048,
+        cdist_workers: int = -1
+    ) -> Tuple[List[str], List[Optional[str]], List[int]]:
+        """
+        Match a whole batch of raw titles at once.
+
+        Titles are deduplicated and normalized, exact hits resolved from the
+        normalized index, and the rest scored against the catalog in one
+        similarity matrix per chunk with rapidfuzz's cdist when it's installed.
+        Otherwise each miss goes through the shortlist path. Results also
+        fill match_cache, so find_best_match answers them without rescoring.
+
+        Args:
+            source_titles: Raw titles, duplicates allowed
+            chunk_size: Titles scored per similarity matrix, bounding its memory
+            cdist_workers: Threads cdist may use; -1 for all cores
+
+        Returns:
+            Tuple of (distinct titles, best match or None, score) lists in the same order
+        """
+        titles = list(dict.fromkeys(source_titles))
+        matches: List[Optional[str]] = [None] * len(titles)
+        scores = [0] * len(titles)
+
+        misses = []
+        for i, title in enumerate(titles):
+            if title in self.match_cache:
+                matches[i], scores[i] = self.match_cache[title]
+                continue
+            processed = self._preprocess_title(title)
+            master_title = self.normalized_titles.get(processed)
+            if master_title is not None:
+                matches[i], scores[i] = master_title, 100
+            else:
+                misses.append((i, processed))
+
+        if cdist is not None and self.candidates:
+            candidate_list = list(self.candidates.values())
+            for start in range(0, len(misses), chunk_size):
+                chunk = misses[start:start + chunk_size]
+                matrix = cdist(
+                    [processed for _, processed in chunk],
+                    candidate_list,
+                    scorer=rapid_fuzz.ratio,
+                    dtype=np.uint8,
+                    workers=cdist_workers
+                )
+                best = matrix.argmax(axis=1)
+                best_scores = matrix[np.arange(len(chunk)), best]
+                for (i, _), candidate_id, score in zip(chunk, best.tolist(), best_scores.tolist()):
+                    if score >= FUZZY_SCORE_CUTOFF:
+                        matches[i], scores[i] = self.candidate_titles[candidate_id], score
+        else:
+            use_shortlist = 0 < self.shortlist_size < len(self.candidates)
+            for i, processed in misses:
+                matches[i], scores[i] = self._fuzzy_match(processed, use_shortlist)
+
+        for title, match, score in zip(titles, matches, scores):
+            self.match_cache[title] = (match, score)
+        return titles, matches, scores
+
+    def match_titles_parallel(
+        self,
+        source_titles: Iterable[str],
+        processes: Optional[int] = None,
+        shard_size: int = 2000
+    ) -> Tuple[List[str], List[Optional[str]], List[int]]:
+        """
+        match_titles spread over a process pool.
+
+        Each worker builds its own matcher once, from the catalog passed to
+        its initializer, so shards carry only titles. Cached and exact hits
+        are resolved here first. Shard results are merged by shard position,
+        so the output doesn't depend on which worker finished first.
+
+        Args:
+            source_titles: Raw titles, duplicates allowed
+            processes: Pool size; defaults to the CPU count
+            shard_size: Titles per task
+
+        Returns:
+            Tuple of (distinct titles, best match or None, score) lists in the same order
+        """
+        titles = list(dict.fromkeys(source_titles))
+        misses = [
+            title for title in titles
+            if title not in self.match_cache and self._preprocess_title(title) not in self.normalized_titles
+        ]
+        shards = [misses[start:start + shard_size] for start in range(0, len(misses), shard_size)]
+
+        self.worker_stats = {}
+        if shards:
+            shard_results = [None] * len(shards)
+            with ProcessPoolExecutor(
+                max_workers=processes or os.cpu_count(),
+                initializer=_init_match_worker,
+                initargs=(self.master_titles, self.threshold, self.shortlist_size)
+            ) as pool:
+                futures = [pool.submit(_match_shard, index, shard) for index, shard in enumerate(shards)]
+                for future in futures:
+                    shard_index, pid, matches, scores, elapsed = future.result()
+                    shard_results[shard_index] = (matches, scores)
+                    stats = self.worker_stats.setdefault(pid, {'titles': 0, 'seconds': 0.0})
+                    stats['titles'] += len(matches)
+                    stats['seconds'] += elapsed
+
+            for shard, (matches, scores) in zip(shards, shard_results):
+                for title, match, score in zip(shard, matches, scores):
+                    self.match_cache[title] = (match, score)
+
+            for pid, stats in sorted(self.worker_stats.items()):
+                rate = stats['titles'] / stats['seconds'] if stats['seconds'] else 0
+                logging.info(f"Match worker {pid}: {stats['titles']} titles in {stats['seconds']:.2f}s ({rate:.0f}/s)")
+
+        # Everything left is a cache or exact hit
+        return self.match_titles(titles)
+
+    def shortlist_recall(self, source_titles: Iterable[str]) -> float:
+        """
+        Fraction of titles whose shortlisted fuzzy match scores as well as
+        scoring the whole catalog. Use it to pick shortlist_size as the
+        catalog grows.
         
-        self.match_cache[source_title] = (best_match, score)
-        return best_match, score
+        Args:
+            source_titles: Sample of raw titles, e.g. track names from the archive
+        """
+        total = agreed = 0
+        for title in set(source_titles):
+            processed = self._preprocess_title(title)
+            if not processed or processed in self.normalized_titles:
+                continue
+            total += 1
+            if self._fuzzy_match(processed, True)[1] == self._fuzzy_match(processed, False)[1]:
+                agreed += 1
+        return agreed / total if total else 1.0
         
-    def process_archive_data(self, archive_data: List[Dict]) -> List[Dict]:
+    def process_archive_data(
+        self,
+        archive_data: Iterable[Dict],
+        processes: int = 1,
+        track_names: Optional[Iterable[str]] = None
+    ) -> List[Dict]:
         """
         Process a list of archive.org show data and standardize song titles.
         
         Args:
-            archive_data: List of show dictionaries from archive.org
+            archive_data: Show dictionaries from archive.org. A list or other
+                re-iterable source is read twice, once for its titles and once
+                to process it; a one-shot iterator is read once
+            processes: Match across this many processes when more than 1
+            track_names: Titles to score up front instead of reading them
+                from archive_data, e.g. JauntDBService.iter_track_names()
             
         Returns:
             Processed show data with standardized titles
         """
-        processed_data = []
+        if track_names is None and iter(archive_data) is not archive_data:
+            track_names = (track['name'] for show in archive_data for track in show.get('tracks', []))
+
+        # Score every distinct title in one batch up front; without any, a
+        # one-shot iterator is matched title by title as it streams
+        if track_names is not None:
+            if processes > 1:
+                self.match_titles_parallel(track_names, processes)
+            else:
+                self.match_titles(track_names)
+        return list(self.iter_processed_data(archive_data))
+
+    def iter_processed_data(self, archive_data: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Standardize song titles one show at a time, e.g. over
+        JauntDBService.iter_show_data(), without holding the archive in memory.
         
+        Args:
+            archive_data: Iterable of show dictionaries
+            
+        Yields:
+            Each show with standardized titles
+        """
         for show in archive_data:
             processed_show = show.copy()
             if 'tracks' in show:
@@ -121,16 +388,14 @@ class SongMatcher:
                     processed_tracks.append(track_copy)
                     
                 processed_show['tracks'] = processed_tracks
-            processed_data.append(processed_show)
-            
-        return processed_data
+            yield processed_show
         
-    def generate_matching_report(self, processed_data: List[Dict]) -> Dict:
+    def generate_matching_report(self, processed_data: Iterable[Dict]) -> Dict:
         """
         Generate a report of the matching process.
         
         Args:
-            processed_data: Processed show data
+            processed_data: Processed show data, read once
             
         Returns:
             Dictionary containing matching statistics and issues
@@ -163,6 +428,120 @@ class SongMatcher:
             'needs_review': sorted(needs_review, key=lambda x: x['score'], reverse=True)
         }
 
+class MatchDecisionCache:
+    """
+    Match decisions persisted in the archive database, next to master_tracks.
+
+    Scored decisions are only reused while the catalog version they were
+    scored against is current, so a catalog change rescores everything once.
+    Manual overrides imported from a reviewed needs_review CSV apply
+    regardless of catalog version and are never overwritten by scoring.
+    """
+
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+        self.loaded_titles = set()
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS match_decisions (
+                    raw_title TEXT PRIMARY KEY,
+                    canonical_title TEXT,
+                    score INTEGER NOT NULL,
+                    catalog_version TEXT NOT NULL,
+                    manual_override INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                )
+            ''')
+
+    def load(self, matcher: SongMatcher) -> int:
+        """
+        Seed matcher.match_cache with every decision still valid for its catalog.
+
+        Returns:
+            Number of decisions loaded
+        """
+        with self.pool.reader() as conn:
+            rows = conn.execute('''
+                SELECT raw_title, canonical_title, score
+                FROM match_decisions
+                WHERE catalog_version = ? OR manual_override = 1
+            ''', (matcher.catalog_version,)).fetchall()
+
+        for row in rows:
+            matcher.match_cache[row['raw_title']] = (row['canonical_title'], row['score'])
+        self.loaded_titles = {row['raw_title'] for row in rows}
+        logging.info(f"Loaded {len(rows)} stored match decisions")
+        return len(rows)
+
+    def save(self, matcher: SongMatcher) -> int:
+        """
+        Store the decisions matcher scored since load(), and drop scored
+        decisions left over from earlier catalog versions.
+
+        Returns:
+            Number of decisions written
+        """
+        rows = [
+            (title, match, score, matcher.catalog_version)
+            for title, (match, score) in matcher.match_cache.items()
+            if title not in self.loaded_titles
+        ]
+        with self.pool.writer() as conn:
+            conn.execute(
+                'DELETE FROM match_decisions WHERE catalog_version != ? AND manual_override = 0',
+                (matcher.catalog_version,)
+            )
+            conn.executemany('''
+                INSERT INTO match_decisions (raw_title, canonical_title, score, catalog_version)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(raw_title) DO UPDATE SET
+                    canonical_title = excluded.canonical_title,
+                    score = excluded.score,
+                    catalog_version = excluded.catalog_version,
+                    updated_at = datetime('now')
+                WHERE manual_override = 0
+            ''', rows)
+        self.loaded_titles.update(title for title, *_ in rows)
+        logging.info(f"Stored {len(rows)} new match decisions")
+        return len(rows)
+
+    def import_reviews(self, csv_path: str, catalog_version: str) -> int:
+        """
+        Record reviewer decisions from a needs_review CSV as manual overrides.
+
+        Rows with a canonical_title filled in are imported; the rest are
+        left for scoring.
+
+        Args:
+            csv_path: CSV written by save_matching_report
+            catalog_version: Catalog the reviewer matched against
+
+        Returns:
+            Number of overrides imported
+        """
+        reviews = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        if 'canonical_title' not in reviews.columns:
+            return 0
+
+        rows = [
+            (row.original_title, row.canonical_title.strip(), catalog_version)
+            for row in reviews.itertuples()
+            if row.canonical_title.strip()
+        ]
+        with self.pool.writer() as conn:
+            conn.executemany('''
+                INSERT INTO match_decisions (raw_title, canonical_title, score, catalog_version, manual_override)
+                VALUES (?, ?, 100, ?, 1)
+                ON CONFLICT(raw_title) DO UPDATE SET
+                    canonical_title = excluded.canonical_title,
+                    score = 100,
+                    catalog_version = excluded.catalog_version,
+                    manual_override = 1,
+                    updated_at = datetime('now')
+            ''', rows)
+        logging.info(f"Imported {len(rows)} reviewed matches from {csv_path}")
+        return len(rows)
+
 def save_matching_results(processed_data: List[Dict], report: Dict, output_path: str):
     """
     Save the matching results and report to files.
@@ -176,17 +555,33 @@ def save_matching_results(processed_data: List[Dict], report: Dict, output_path:
     with open(f"{output_path}_processed_data.json", 'w') as f:
         json.dump(processed_data, f, indent=2)
         
-    # Save report
+    save_matching_report(report, output_path)
+
+def save_matching_report(report: Dict, output_path: str):
+    """Save the matching report, plus the tracks needing review as CSV"""
     with open(f"{output_path}_matching_report.json", 'w') as f:
         json.dump(report, f, indent=2)
         
-    # Save needs review as CSV for easy viewing
+    # Save needs review as CSV for easy viewing; reviewers fill in
+    # canonical_title, and MatchDecisionCache.import_reviews picks it up
     if report['needs_review']:
-        pd.DataFrame(report['needs_review']).to_csv(
+        needs_review = pd.DataFrame(report['needs_review'])
+        needs_review['canonical_title'] = ''
+        needs_review.to_csv(
             f"{output_path}_needs_review.csv",
             index=False
         )
 
+def write_processed_data(processed_data: Iterable[Dict], output_path: str) -> Iterator[Dict]:
+    """
+    Write processed shows to {output_path}_processed_data.jsonl, one per line,
+    passing each show through so a report can be built in the same pass.
+    """
+    with open(f"{output_path}_processed_data.jsonl", 'w') as f:
+        for show in processed_data:
+            f.write(json.dumps(show) + '\n')
+            yield show
+
 def csv_to_list(file_path):
     data_list = []
     try:
@@ -205,7 +600,7 @@ def csv_to_list(file_path):
     return data_list
 
 
-# Example usage:
+# Example usage (from backend/): python -m app.services.song_matching_service
 if __name__ == "__main__":
     # Example master titles
     master_titles = csv_to_list('/Users/alhanger/Documents/Personal/The Jauntee Web App/jauntee-music-stream/backend/app/services/jauntee_tracks_cleaned.csv')
@@ -213,12 +608,21 @@ if __name__ == "__main__":
     
     # Initialize matcher
     matcher = SongMatcher(master_titles)
-    scraper = ArchiveScraper(data_dir)
-    
-    # Process archive data
-    # archive_data = ... # Load your archive.org data here
+    db_service = JauntDBService(data_dir)
+    decisions = MatchDecisionCache(db_service.pool)
+
+    # Apply last run's reviewed matches, then reuse every stored decision
+    # so only titles never seen against this catalog get scored
+    if os.path.exists("output/song_matching_needs_review.csv"):
+        decisions.import_reviews("output/song_matching_needs_review.csv", matcher.catalog_version)
+    decisions.load(matcher)
 
-    archive_data = scraper.load_show_data()
-    processed_data = matcher.process_archive_data(archive_data)
-    report = matcher.generate_matching_report(processed_data)
-    save_matching_results(processed_data, report, "output/song_matching")
\ No newline at end of file
+    # Score every distinct track name in one batch, then stream the archive
+    # through the matcher one show at a time, answering from the cache
+    matcher.match_titles_parallel(db_service.iter_track_names())
+    decisions.save(matcher)
+    archive_data = db_service.iter_show_data()
+    processed_data = matcher.iter_processed_data(archive_data)
+    report = matcher.generate_matching_report(write_processed_data(processed_data, "output/song_matching"))
+    save_matching_report(report, "output/song_matching")
+    db_service.close()
\ No newline at end of file
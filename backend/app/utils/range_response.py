@@ -0,0 +1,225 @@
+import os
+import stat
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# ASGI extension that lets the server hand the file descriptor to sendfile()
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when none of the requested byte ranges overlap the file"""
+
+
+def parse_range_header(range_header: str, file_size: int, max_ranges: int = 16) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse an HTTP Range header into a sorted list of inclusive (start, end) pairs.
+
+    Args:
+        range_header: Raw value of the Range header
+        file_size: Size of the file being served
+        max_ranges: Upper bound on ranges accepted from a single request
+
+    Returns:
+        List of merged ranges, or None if the header should be ignored
+    """
+    units, _, spec = range_header.partition('=')
+    if units.strip().lower() != 'bytes' or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start_str, sep, end_str = part.partition('-')
+        if not sep:
+            return None
+        try:
+            if start_str == '':
+                # Suffix range, e.g. "bytes=-500" is the last 500 bytes
+                length = int(end_str)
+                if length <= 0:
+                    continue
+                start, end = max(file_size - length, 0), file_size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else file_size - 1
+        except ValueError:
+            return None
+
+        if start >= file_size:
+            continue
+        if start < 0 or end < start:
+            return None
+        ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    if len(ranges) > max_ranges:
+        return None
+
+    # Merge overlapping/adjacent ranges so clients can't make us send bytes twice
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(Response):
+    """
+    File response that honours Range, If-Range and If-None-Match.
+
+    Uses the ASGI zero-copy send extension (sendfile) when the server offers it
+    and falls back to chunked reads otherwise.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Headers,
+        media_type: str = "audio/mpeg",
+        stat_result: Optional[os.stat_result] = None,
+    ):
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+
+        stat_result = stat_result or os.stat(path)
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise FileNotFoundError(path)
+        self.file_size = stat_result.st_size
+        self.etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+        self.status_code = 200
+        self.ranges: List[Tuple[int, int]] = [(0, self.file_size - 1)] if self.file_size else []
+        self.boundary = None
+
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": self.etag,
+            "last-modified": self.last_modified,
+        }
+
+        if self._not_modified(request_headers):
+            self.status_code = 304
+            self.ranges = []
+            self.init_headers(headers)
+            return
+
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers.get("if-range")):
+            try:
+                ranges = parse_range_header(range_header, self.file_size)
+            except RangeNotSatisfiable:
+                ranges = None
+                self.status_code = 416
+                self.ranges = []
+                headers["content-range"] = f"bytes */{self.file_size}"
+                headers["content-length"] = "0"
+            if ranges:
+                self.status_code = 206
+                self.ranges = ranges
+
+        if self.status_code == 206 and len(self.ranges) > 1:
+            self.boundary = secrets.token_hex(16)
+            headers["content-type"] = f"multipart/byteranges; boundary={self.boundary}"
+            headers["content-length"] = str(sum(
+                len(self._part_header(start, end)) + (end - start + 1) + 2
+                for start, end in self.ranges
+            ) + len(self._closing_boundary()))
+        elif self.status_code in (200, 206):
+            headers["content-type"] = self.media_type
+            headers["content-length"] = str(sum(end - start + 1 for start, end in self.ranges))
+            if self.status_code == 206:
+                start, end = self.ranges[0]
+                headers["content-range"] = f"bytes {start}-{end}/{self.file_size}"
+
+        self.init_headers(headers)
+
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+    def _if_range_matches(self, if_range: Optional[str]) -> bool:
+        """A stale If-Range validator means the client gets the full file"""
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith('W/'):
+            return if_range == self.etag
+        try:
+            return parsedate_to_datetime(if_range) >= parsedate_to_datetime(self.last_modified)
+        except (TypeError, ValueError):
+            return False
+
+    def _part_header(self, start: int, end: int) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Type: {self.media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{self.file_size}\r\n\r\n"
+        ).encode("latin-1")
+
+    def _closing_boundary(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if scope["method"].upper() == "HEAD" or not self.ranges:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zero_copy = ZERO_COPY_EXTENSION in scope.get("extensions", {})
+        with open(self.path, "rb") as file:
+            for start, end in self.ranges:
+                if self.boundary:
+                    await send({"type": "http.response.body", "body": self._part_header(start, end), "more_body": True})
+
+                if zero_copy:
+                    await send({
+                        "type": ZERO_COPY_EXTENSION,
+                        "file": file,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": True,
+                    })
+                else:
+                    await self._send_chunks(file, start, end, send)
+
+                if self.boundary:
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+
+        closing = self._closing_boundary() if self.boundary else b""
+        await send({"type": "http.response.body", "body": closing, "more_body": False})
+
+    async def _send_chunks(self, file, start: int, end: int, send: Send) -> None:
+        remaining = end - start + 1
+        await anyio.to_thread.run_sync(file.seek, start)
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(file.read, min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
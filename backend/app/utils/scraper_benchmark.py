@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services'))
+from data_sync_service import ArchiveScraper
+
+def synthetic_collection(shows: int = 4000, tracks_per_show: int = 25):
+    """Parsed (show_row, track_rows) pairs shaped like ArchiveScraper.fetch_show output"""
+    now = datetime.now().isoformat()
+    for i in range(shows):
+        show_id = f'jauntee{i:05d}'
+        show_row = (
+            show_id, f'20{i % 20:02d}-{i % 12 + 1:02d}-{i % 28 + 1:02d}', f'Venue {i % 300}',
+            'Somewhere, CO', 'Synthetic show', 'SBD', '{}', now, now
+        )
+        track_rows = [
+            (f'{show_id}/d1t{t:02d}.mp3', show_id, f'Song {(i + t) % 400}', '420.5',
+             9000000, 'VBR MP3', '192', t)
+            for t in range(1, tracks_per_show + 1)
+        ]
+        yield show_row, track_rows
+
+def per_row_load(scraper: ArchiveScraper, collection) -> int:
+    """The old write path: one execute per row and a commit per show"""
+    conn = sqlite3.connect(scraper.db_path)
+    c = conn.cursor()
+    rows = 0
+    for show_row, track_rows in collection:
+        scraper.unindex_shows(c, [show_row[0]])
+        c.execute('''
+            INSERT OR REPLACE INTO shows
+            (id, date, venue, location, description, source, metadata, last_updated, archive_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', show_row)
+        c.execute('DELETE FROM tracks WHERE show_id = ?', (show_row[0],))
+        for track_row in track_rows:
+            c.execute('''
+                INSERT OR REPLACE INTO tracks
+                (id, show_id, name, duration, size, format, bitrate, track_number)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', track_row)
+        scraper.index_shows(c, [show_row[0]])
+        conn.commit()
+        rows += len(track_rows)
+    conn.close()
+    return rows
+
+def batched_load(scraper: ArchiveScraper, collection) -> int:
+    """The bulk write path scrape_shows(force=True) uses"""
+    conn = sqlite3.connect(scraper.db_path)
+    scraper.configure_bulk_load(conn)
+    c = conn.cursor()
+    scraper.drop_deferred_indexes(c)
+    rows = 0
+    batch = []
+    for parsed in collection:
+        batch.append(parsed)
+        if sum(len(track_rows) for _, track_rows in batch) >= scraper.batch_size:
+            with conn:
+                scraper.write_shows(c, batch)
+            rows += sum(len(track_rows) for _, track_rows in batch)
+            batch.clear()
+    if batch:
+        with conn:
+            scraper.write_shows(c, batch)
+        rows += sum(len(track_rows) for _, track_rows in batch)
+    scraper.create_indexes(c)
+    scraper.optimize_search_index(c)
+    conn.commit()
+    conn.close()
+    return rows
+
+def run(name: str, load, shows: int, tracks_per_show: int, batch_size: int):
+    with tempfile.TemporaryDirectory() as db_dir:
+        scraper = ArchiveScraper(db_dir, batch_size=batch_size)
+        start = time.perf_counter()
+        rows = load(scraper, synthetic_collection(shows, tracks_per_show))
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {rows} track rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec)")
+
+if __name__ == "__main__":
+    # Synthetic 100k-track collection: 4000 shows x 25 tracks
+    shows = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    tracks_per_show = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    run('per-row', per_row_load, shows, tracks_per_show, batch_size)
+    run('batched', batched_load, shows, tracks_per_show, batch_size)
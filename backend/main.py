@@ -1,8 +1,10 @@
 # app/main.py updates
+import asyncio
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.auth import get_current_user
-from app.api.shows import router as shows_router, cache_manager
+from app.api.shows import router as shows_router, cache_manager, metadata_cache, async_db_service
+from app.api.songs import router as songs_router
 
 app = FastAPI(title="The Jauntee Stream API")
 
@@ -23,12 +25,22 @@ app.add_middleware(
 # Include routers
 # app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(shows_router, prefix="/api/shows", tags=["shows"])
-# app.include_router(app.api.songs.router, prefix="/api/songs", tags=["songs"])
+app.include_router(songs_router, prefix="/api/songs", tags=["songs"])
 
 # Add to main.py
 async def start_cache_worker():
     await cache_manager.start_cache_worker()
 
-# @app.on_event("startup")
-# async def startup_event():
-#     async.create_task(start_cache_worker())
\ No newline at end of file
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop the worker pool before its session closes underneath it
+    app.state.cache_worker.cancel()
+    await asyncio.gather(app.state.cache_worker, return_exceptions=True)
+    await cache_manager.close()
+    await metadata_cache.close()
+    async_db_service.close()
+
+@app.on_event("startup")
+async def startup_event():
+    # Keep a reference: the event loop only holds tasks weakly
+    app.state.cache_worker = asyncio.create_task(start_cache_worker())
\ No newline at end of file
@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.data_sync_service import ArchiveScraper
+from app.services.jauntdb_service import JauntDBService
+
+@pytest.fixture
+def db_service(tmp_path):
+    ArchiveScraper(tmp_path)
+    service = JauntDBService(tmp_path)
+    with service.pool.writer() as conn:
+        conn.executemany(
+            'INSERT INTO shows (id, date, venue) VALUES (?, ?, ?)',
+            [(f'jauntee{year}-06-28', f'{year}-06-28', 'Venue') for year in range(2011, 2024)]
+        )
+    yield service
+    service.close()
+
+def query_plans(service, query, *args):
+    """Run a JauntDBService query and return the EXPLAIN QUERY PLAN of each statement it executed"""
+    statements = []
+    with service.pool.reader() as conn:
+        # Readers are per thread, so the query below runs on this same connection
+        conn.set_trace_callback(statements.append)
+        try:
+            query(*args)
+        finally:
+            conn.set_trace_callback(None)
+        return [
+            ' | '.join(row['detail'] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}'))
+            for statement in statements
+        ]
+
+def test_date_range_uses_date_index(db_service):
+    plans = query_plans(db_service, db_service._query_shows_between, '2017-01-01', '2018-01-01')
+    assert plans == ['SEARCH shows USING INDEX idx_shows_date (date>? AND date<?)']
+
+def test_on_this_day_uses_month_day_index(db_service):
+    plans = query_plans(db_service, db_service.query_shows_on_this_day, 6, 28)
+    assert plans == ['SEARCH shows USING INDEX idx_shows_month_day (month_day=?)']
+
+def test_years_use_year_index(db_service):
+    plans = query_plans(db_service, db_service.get_years)
+    assert plans == ['SEARCH shows USING INDEX idx_shows_year (year>?)']
+
+def test_date_queries_return_matching_shows(db_service):
+    assert [show['date'] for show in db_service._query_shows_between('2017-01-01', '2018-01-01')] == ['2017-06-28']
+    assert len(db_service.query_shows_on_this_day(6, 28)) == 13
+    assert db_service.get_years()[:2] == [2023, 2022]
@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+import requests
+
+from app.services.data_sync_service import ArchiveScraper
+
+class FakeArchiveScraper(ArchiveScraper):
+    """ArchiveScraper over an in-memory collection instead of archive.org"""
+
+    def __init__(self, db_dir, collection, errors):
+        self.collection = collection  # identifier -> updatedate
+        self.errors = errors          # identifier -> exception raised when fetched
+        self.fetched = []
+        super().__init__(db_dir, requests_per_second=1000, max_item_attempts=3)
+
+    def fetch_collection_metadata(self, query=None):
+        return [{'identifier': identifier, 'updatedate': version} for identifier, version in self.collection.items()]
+
+    def fetch_show(self, identifier, version):
+        self.fetched.append(identifier)
+        if identifier in self.errors:
+            raise self.errors[identifier]
+        show_row = (identifier, '2017-06-28', 'Venue', None, None, None, '{}', '2024-01-01', version)
+        track_row = (f'{identifier}/t01.mp3', identifier, 'Song', '60', 5, 'VBR MP3', '192', 1)
+        return show_row, [track_row]
+
+def run_items(scraper):
+    conn = sqlite3.connect(scraper.db_path)
+    try:
+        return {
+            identifier: (status, attempts)
+            for identifier, status, attempts in conn.execute(
+                'SELECT identifier, status, attempts FROM scrape_run_items '
+                'WHERE run_id = (SELECT MAX(id) FROM scrape_runs)'
+            )
+        }
+    finally:
+        conn.close()
+
+@pytest.fixture
+def scraper(tmp_path):
+    return FakeArchiveScraper(
+        tmp_path,
+        collection={'show-a': '2024-01-01', 'flaky': '2024-01-01', 'removed': '2024-01-01'},
+        errors={
+            'flaky': requests.exceptions.ConnectionError('connection reset'),
+            'removed': LookupError('No such archive.org item: removed'),
+        }
+    )
+
+def test_failed_run_does_not_block_the_next_listing(scraper):
+    scraper.scrape_shows()
+    assert scraper.get_run_progress()['status'] == 'failed'
+    assert run_items(scraper) == {
+        'show-a': ('done', 0),
+        'flaky': ('failed', 1),
+        'removed': ('failed', 3),
+    }
+
+    # Night 2: a new show appears; it is listed and fetched, and the
+    # retryable failure is carried into the new run
+    scraper.collection['show-b'] = '2024-01-02'
+    scraper.fetched.clear()
+    scraper.scrape_shows()
+
+    assert sorted(scraper.fetched) == ['flaky', 'show-b']
+    assert scraper.get_run_progress()['id'] == 2
+    items = run_items(scraper)
+    assert items['show-b'] == ('done', 0)
+    assert items['show-a'] == ('skipped', 0)
+    assert items['flaky'] == ('failed', 2)
+
+def test_retryable_failures_are_given_up_after_max_attempts(scraper):
+    for _ in range(3):
+        scraper.scrape_shows()
+    assert run_items(scraper)['flaky'] == ('failed', 3)
+    assert scraper.get_run_progress()['status'] == 'complete'
+
+    scraper.fetched.clear()
+    scraper.scrape_shows()
+    assert scraper.fetched == []
+
+def test_recovered_item_is_written(scraper):
+    scraper.scrape_shows()
+    del scraper.errors['flaky']
+    scraper.scrape_shows()
+
+    assert run_items(scraper)['flaky'] == ('done', 1)
+    conn = sqlite3.connect(scraper.db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM shows WHERE id = 'flaky'").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+def test_interrupted_run_is_resumed(scraper):
+    scraper.scrape_shows()
+    conn = sqlite3.connect(scraper.db_path)
+    with conn:
+        conn.execute("UPDATE scrape_runs SET status = 'fetching' WHERE id = 1")
+    conn.close()
+
+    scraper.fetched.clear()
+    scraper.scrape_shows()
+    assert scraper.get_run_progress()['id'] == 1
+    assert scraper.fetched == ['flaky']
+
+def test_given_up_item_is_retried_when_it_changes(scraper):
+    scraper.scrape_shows()
+    scraper.fetched.clear()
+    scraper.scrape_shows()
+    assert 'removed' not in scraper.fetched
+
+    scraper.collection['removed'] = '2024-02-01'
+    del scraper.errors['removed']
+    scraper.fetched.clear()
+    scraper.scrape_shows()
+    assert 'removed' in scraper.fetched
+    assert run_items(scraper)['removed'] == ('done', 0)
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from app.services.song_matching_service import SongMatcher
+
+CATALOG_WORDS = (
+    'dark star ripple sugar magnolia scarlet fire morning dew bertha jack straw '
+    'eyes world stella blue shakedown street wharf rat jaunt river mountain'
+).split()
+
+@pytest.fixture
+def catalog():
+    rng = random.Random(7)
+    return sorted({' '.join(rng.sample(CATALOG_WORDS, 3)).title() for _ in range(600)})
+
+def misspell(title: str, rng: random.Random) -> str:
+    """A title with one typo and archive-style track noise"""
+    chars = list(title)
+    position = rng.randrange(len(chars))
+    chars[position] = rng.choice('aeiouxz')
+    return f"{rng.randint(1, 20):02d}. {''.join(chars)}"
+
+def test_shortlist_matches_exhaustive_scoring(catalog):
+    rng = random.Random(11)
+    titles = [misspell(rng.choice(catalog), rng) for _ in range(120)]
+    matcher = SongMatcher(catalog, shortlist_size=25)
+
+    assert matcher.shortlist_size < len(matcher.candidates)
+    assert matcher.shortlist_recall(titles) >= 0.99